@@ -0,0 +1,138 @@
+"""
+Check the NumPy batch engine against Game, then measure its throughput.
+
+The check plays the same actions (mostly a bot's, so rows get cleared, plus random
+ones) and ticks on a BatchGame and on one Game per seed, and compares every board,
+piece, score, level and line count after each step. The benchmark steps a large
+batch and reports board-steps per second:
+
+    python benchmarks/batch.py [boards] [steps]
+"""
+from collections import deque
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import actions
+from batch import BatchGame
+from bot import Bot
+from blocks import PIECES
+from game import Game
+from timing import FixedTimestep
+
+CHOICES = [0, actions.MOVE_LEFT, actions.MOVE_RIGHT, actions.MOVE_DOWN, actions.MOVE_DOWN, actions.ROTATE]
+
+
+class Driver:
+    """
+    Chooses inputs for one scalar game: mostly the bot's planned path, so rows get
+    cleared, mixed with random moves and occasional pauses and resets so every
+    path through the rules is compared.
+    """
+    def __init__(self, bot, generator):
+        self.bot = bot
+        self.generator = generator
+        self.plan = deque()
+        self.block = None
+
+    def next_action(self, game):
+        """
+        Returns:
+            int: The action code to apply to the game next, 0 for none.
+        """
+        roll = self.generator.random()
+        if roll < 0.002:
+            return actions.PAUSE_TOGGLE
+        if roll < 0.003:
+            return actions.RESET
+        if roll < 0.1:
+            return self.generator.choice(CHOICES)
+        # A plan knocked off course by random moves or gravity is simply played out.
+        if game.current_block is not self.block and not game.game_over:
+            self.block = game.current_block
+            placement = self.bot.choose(game)
+            self.plan = deque(placement.path if placement is not None else ())
+        if not self.plan:
+            return 0
+        action = self.plan.popleft()
+        return action
+
+
+def check_equivalence(seeds, steps, tick_ms=FixedTimestep(240).tick_ms):
+    """
+    Play identical inputs on a BatchGame and on scalar Games and compare them after every step.
+
+    Args:
+        seeds (list[int]): One seed per board.
+        steps (int): Steps to play; each applies one action per board, then one tick.
+
+    Returns:
+        tuple[int, int]: Pieces locked and rows cleared across all the scalar games,
+            to show the run exercised locking and clearing.
+
+    Raises:
+        AssertionError: If any board differs from its Game.
+    """
+    batch = BatchGame(seeds)
+    games = [Game(seed=seed) for seed in seeds]
+    bot = Bot(beam_width=1)
+    drivers = [Driver(bot, random.Random(seed)) for seed in seeds]
+    locked = 0
+    cleared = 0
+    for step in range(steps):
+        codes = np.array([driver.next_action(game) for driver, game in zip(drivers, games)])
+        batch.apply_actions(codes)
+        batch.tick(tick_ms)
+        for game, code in zip(games, codes.tolist()):
+            block = game.current_block
+            lines = game.total_lines_cleared
+            if code:
+                game.apply_action(code)
+            game.tick(tick_ms)
+            locked += game.current_block is not block and code != actions.RESET
+            cleared += max(0, game.total_lines_cleared - lines)
+        for board, game in enumerate(games):
+            block = game.current_block
+            expected = (bytes(game.grid.cells), PIECES.index(type(block)), block.rotation_state, block.row_offset,
+                        block.column_offset, PIECES.index(type(game.next_block)), game.score, game.level,
+                        game.total_lines_cleared, game.gravity_timer, game.paused, game.game_over)
+            actual = (batch.cells[board].tobytes(), batch.piece[board], batch.rotation[board], batch.row[board],
+                      batch.column[board], batch.next_piece[board], batch.score[board], batch.level[board],
+                      batch.total_lines_cleared[board], batch.gravity_timer[board], batch.paused[board],
+                      batch.game_over[board])
+            assert expected == actual, f"board {board} (seed {seeds[board]}) differs at step {step}"
+    return locked, cleared
+
+
+def run_batch(boards, steps, tick_ms=FixedTimestep(240).tick_ms):
+    """
+    Step a batch with random actions, resetting boards whose games end.
+
+    Returns:
+        float: Board-steps per second.
+    """
+    batch = BatchGame(list(range(boards)))
+    generator = np.random.default_rng(0)
+    codes = generator.choice(CHOICES[1:], size=(64, boards))
+    start = time.perf_counter()
+    for step in range(steps):
+        batch.apply_actions(codes[step % 64])
+        batch.tick(tick_ms)
+        if batch.game_over.any():
+            batch.reset(np.flatnonzero(batch.game_over))
+    elapsed = time.perf_counter() - start
+    return boards * steps / elapsed
+
+
+if __name__ == "__main__":
+    boards = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    locked, cleared = check_equivalence(list(range(64)), 3000)
+    print(f"equivalence: 64 seeds x 3000 steps match Game ({locked} pieces locked, {cleared} rows cleared)")
+    rate = run_batch(boards, steps)
+    print(f"{boards} boards x {steps} steps: {rate:,.0f} board-steps/s")
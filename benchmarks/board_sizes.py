@@ -0,0 +1,57 @@
+"""
+Show how the cost of the engine and of a frame grows with the size of the board.
+
+Runs the suite's row clearing, scripted game and frame benchmarks on boards from the
+standard 20x10 up to 200x100, each with the bottom half filled and a cell size that
+keeps the window on screen, using SDL's dummy video and audio drivers. Costs are in
+microseconds, best of several rounds, with the growth over the standard board:
+
+    python benchmarks/board_sizes.py [rounds]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from suite import FrameBenchmarks, bench_clear_full_rows, bench_scripted_game
+
+# (rows, columns, cell size in pixels)
+SIZES = ((20, 10, 30), (40, 20, 15), (100, 50, 8), (200, 100, 4))
+
+
+def run_size(num_rows, num_cols, cell_size, rounds):
+    """
+    Time every benchmark on one board size.
+
+    Returns:
+        dict: Microseconds per operation, keyed by benchmark name.
+    """
+    frames = FrameBenchmarks(num_rows, num_cols, cell_size)
+    scale = num_rows * num_cols // 200
+    benchmarks = {
+        "clear 4 rows": (lambda number: bench_clear_full_rows(number, num_rows, num_cols), max(20, 1000 // scale)),
+        "game tick": (lambda number: bench_scripted_game(number, num_rows, num_cols), 20_000),
+        "full repaint": (frames.bench_full_repaint, max(5, 100 // scale)),
+        "frame after move": (frames.bench_after_move, 500),
+    }
+    best = {}
+    for _ in range(rounds):
+        for name, (run, number) in benchmarks.items():
+            cost = run(number) / number * 1e6
+            best[name] = min(cost, best.get(name, cost))
+    return best
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    results = {size: run_size(*size, rounds) for size in SIZES}
+    standard = results[SIZES[0]]
+    names = list(standard)
+    print(f"{'board':>16}" + "".join(f"{name:>24}" for name in names))
+    for (num_rows, num_cols, cell_size), costs in results.items():
+        cells = "".join(f"{costs[name]:12.1f} us {costs[name] / standard[name]:6.1f}x  " for name in names)
+        print(f"{num_rows:>5}x{num_cols:<4} @{cell_size:>2}px" + cells)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Soak test for the autoplay bot.
+
+Plays a headless game with gravity at the fastest drop speed, timing every decision
+against that drop interval, and reports lines cleared, decision times and transposition cache counters:
+
+    python benchmarks/bot.py [pieces] [beam width] [processes]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from bot import Autoplayer, Bot
+from game import Game
+
+
+def soak(pieces, beam_width, processes, tick_rate=240):
+    """
+    Play until `pieces` pieces have locked, resetting after a game over.
+
+    Returns:
+        dict: Lines cleared, game overs and decision times in milliseconds.
+    """
+    game = Game()
+    game.level = 10  # The drop speed bottoms out at level 10 and the level never goes down.
+    bot = Bot(beam_width=beam_width, processes=processes, parallel_threshold=1 if processes else 10 ** 6)
+    player = Autoplayer(bot)
+    choose = bot.choose
+    decisions = []
+
+    def timed_choose(game):
+        start = time.perf_counter()
+        placement = choose(game)
+        decisions.append((time.perf_counter() - start) * 1000)
+        return placement
+
+    bot.choose = timed_choose
+    locked = 0
+    lines = 0
+    game_overs = 0
+    block = game.current_block
+    try:
+        while locked < pieces:
+            player.update(game)
+            game.tick(1000 / tick_rate)
+            if game.current_block is not block:
+                locked += 1
+                block = game.current_block
+            if game.game_over:
+                game_overs += 1
+                lines += game.total_lines_cleared
+                game.reset()
+                game.level = 10
+    finally:
+        bot.close()
+    lines += game.total_lines_cleared
+    decisions.sort()
+    return {
+        "lines": lines,
+        "game_overs": game_overs,
+        "decision_ms_p50": decisions[len(decisions) // 2],
+        "decision_ms_max": decisions[-1],
+        "drop_interval_ms": game.get_drop_speed(),
+        "cache": bot.cache.stats(),
+    }
+
+
+if __name__ == "__main__":
+    pieces = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    beam_width = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    print(soak(pieces, beam_width, processes or None))
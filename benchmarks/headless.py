@@ -0,0 +1,75 @@
+"""
+Measure how many logic steps per second the headless engine can run.
+
+A step is one call into Game: move_left, move_right, move_down or rotate.
+Games that end are reset and the run carries on. Run from the repository root:
+
+    python benchmarks/headless.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from game import Game
+
+
+def run_steps(steps, seed=0):
+    """
+    Drive a Game with random inputs for a fixed number of steps.
+
+    Args:
+        steps (int): Number of logic steps to run.
+        seed (int): Seed for the input and piece generators.
+
+    Returns:
+        float: Steps per second achieved.
+    """
+    game = Game(seed=seed)
+    moves = [game.move_left, game.move_right, game.move_down, game.move_down, game.rotate]
+    inputs = random.Random(seed)
+    choices = [inputs.choice(moves) for _ in range(1000)]
+    start = time.perf_counter()
+    for step in range(steps):
+        choices[step % 1000]()
+        if game.game_over:
+            game.reset()
+    elapsed = time.perf_counter() - start
+    return steps / elapsed
+
+
+def run_clones(count, seed=0):
+    """
+    Time Game.clone() and a snapshot()/restore() round trip on a game in progress.
+
+    Args:
+        count (int): Number of clones, and of round trips, to time.
+        seed (int): Seed for the game.
+
+    Returns:
+        tuple[float, float]: Clones per second and round trips per second.
+    """
+    game = Game(seed=seed)
+    moves = [game.move_left, game.rotate] + [game.move_down] * 8
+    for step in range(300):
+        moves[step % len(moves)]()
+    start = time.perf_counter()
+    for _ in range(count):
+        game.clone()
+    clone_rate = count / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(count):
+        game.restore(game.snapshot())
+    restore_rate = count / (time.perf_counter() - start)
+    return clone_rate, restore_rate
+
+
+if __name__ == "__main__":
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    rate = run_steps(steps)
+    print(f"{steps} steps: {rate:,.0f} steps/s")
+    clone_rate, restore_rate = run_clones(100_000)
+    print(f"clone: {clone_rate:,.0f}/s, snapshot + restore: {restore_rate:,.0f}/s")
+    print("pygame imported:", "pygame" in sys.modules)
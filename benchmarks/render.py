@@ -0,0 +1,81 @@
+"""
+Compare the per-frame cost of drawing the board.
+
+Measures the old approach (one pygame.draw.rect per cell, every frame) against
+the tile atlas renderer doing a full repaint, a frame after a single move and
+an idle frame. Uses SDL's dummy video driver, so no display is needed:
+
+    python benchmarks/render.py
+"""
+import os
+import sys
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import pygame
+from colours import Colours
+from renderer import Renderer
+from suite import mid_game
+
+
+def draw_rect_per_cell(screen, game, colours, cell_size=30):
+    """
+    The drawing code the renderer replaced: a new Rect and draw.rect call per cell.
+    """
+    grid = game.grid
+    for row in range(grid.num_rows):
+        for column in range(grid.num_cols):
+            cell_rect = pygame.Rect(column*cell_size + 11, row*cell_size + 11, cell_size - 1, cell_size - 1)
+            pygame.draw.rect(screen, colours[grid.grid[row][column]], cell_rect)
+    block = game.current_block
+    for position in block.get_cell_position():
+        cell_rect = pygame.Rect(11 + position.column*cell_size, 11 + position.row*cell_size, cell_size - 1, cell_size - 1)
+        pygame.draw.rect(screen, colours[block.id], cell_rect)
+
+
+def per_frame_us(function, number=500):
+    """
+    Best-of-five average cost of one call, in microseconds.
+    """
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((500, 620))
+    game = mid_game()
+    renderer = Renderer()
+    colours = Colours.get_cell_colours()
+
+    def full_repaint():
+        renderer.invalidate()
+        renderer.draw(screen, game)
+
+    def board_only():
+        renderer.draw_grid(screen, game.grid)
+        renderer.draw_block(screen, game.current_block, 11, 11)
+
+    moves = [game.move_left, game.move_right]
+    frame = [0]
+
+    def one_move():
+        moves[frame[0] % 2]()
+        frame[0] += 1
+        renderer.draw(screen, game)
+
+    results = {
+        "draw.rect per cell": per_frame_us(lambda: draw_rect_per_cell(screen, game, colours)),
+        "tile atlas, board only": per_frame_us(board_only),
+        "tile atlas, full repaint": per_frame_us(full_repaint),
+        "tile atlas, after one move": per_frame_us(one_move),
+        "tile atlas, idle frame": per_frame_us(lambda: renderer.draw(screen, game)),
+    }
+    for name, cost in results.items():
+        print(f"{name:30} {cost:8.1f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
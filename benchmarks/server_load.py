@@ -0,0 +1,307 @@
+"""
+Load test for the multiplayer server: how many boards can one core host?
+
+The server runs in its own process, so its CPU use can be measured on its own.
+Simulated players in client processes each create a board and press random keys
+(restarting when they top out), and spectators each watch a few boards. Every
+client decodes every update it receives, as a real one would. For each load the
+test reports the server's CPU use, how late gravity drops ran and how long players
+waited from a key press to the next update of their board. Loads are doubled until
+one misses a limit, then bisected:
+
+    python benchmarks/server_load.py [--start 250] [--seconds 5]
+
+A load passes while the server stays under 90% of a core, the 99th percentile of
+drop lateness is within a frame and of input latency within 50 ms. Since clients
+share the machine with the server, the server's CPU per board is also extrapolated
+to the boards one whole core could host.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import actions
+import server
+
+MAX_CPU = 0.9
+MAX_LATENESS_MS = 1000 / 60
+MAX_INPUT_LATENCY_MS = 50
+KEYS = [actions.MOVE_LEFT, actions.MOVE_RIGHT, actions.MOVE_DOWN, actions.MOVE_DOWN, actions.ROTATE]
+
+
+def percentile(values, fraction):
+    """
+    Returns:
+        float: The value below which `fraction` of the values lie, 0 for no values.
+    """
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0.0
+
+
+async def host(game_server, connection):
+    """
+    Serve until told to stop, answering "measure" (start a measurement) and "stats"
+    (end it) over the pipe.
+    """
+    loop = asyncio.get_running_loop()
+    serving = asyncio.create_task(game_server.serve(port=0))
+    while game_server.port is None:
+        await asyncio.sleep(0.01)
+    connection.send(game_server.port)
+    while True:
+        command = await loop.run_in_executor(None, connection.recv)
+        if command == "measure":
+            start = (time.perf_counter(), time.process_time(), game_server.drops, game_server.updates,
+                     game_server.bytes_sent)
+            game_server.lateness.clear()
+            connection.send(None)
+        elif command == "stats":
+            wall = time.perf_counter() - start[0]
+            connection.send({
+                "cpu": (time.process_time() - start[1]) / wall,
+                "drops": (game_server.drops - start[2]) / wall,
+                "updates": (game_server.updates - start[3]) / wall,
+                "kib": (game_server.bytes_sent - start[4]) / wall / 1024,
+                "lateness": percentile(game_server.lateness, 0.99) * 1000,
+                "boards": len(game_server.boards),
+                "dropped_clients": game_server.dropped_clients,
+            })
+        else:
+            serving.cancel()
+            return
+
+
+def run_server(send_rate, connection):
+    """
+    Entry point of the server process.
+    """
+    asyncio.run(host(server.GameServer(send_rate=send_rate), connection))
+
+
+async def play(port, seed, actions_per_second, latencies, welcomed, stop):
+    """
+    One simulated player: create a board and press random keys until `stop` is set,
+    restarting the game when it ends. Adds the board's id to `welcomed` once it exists,
+    and records the time from each key press to the next update of the board, one
+    press at a time.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(server.COMMAND.pack(server.NEW, seed))
+    boards = {}
+    generator = random.Random(seed)
+    pressed = None
+    restarting = False
+
+    async def press():
+        nonlocal pressed
+        while not stop.is_set():
+            await asyncio.sleep(generator.expovariate(actions_per_second))
+            if pressed is None:
+                pressed = time.perf_counter()
+            writer.write(server.COMMAND.pack(server.ACTION, generator.choice(KEYS)))
+
+    keys = asyncio.create_task(press())
+    try:
+        while not stop.is_set():
+            kind, board_id = await server.read_message(reader, boards)
+            if kind == server.WELCOME:
+                welcomed.append(board_id)
+            if kind != server.UPDATE:
+                continue
+            if pressed is not None:
+                latencies.append(time.perf_counter() - pressed)
+                pressed = None
+            if boards[board_id].game_over and not restarting:
+                writer.write(server.COMMAND.pack(server.ACTION, actions.RESET))
+            restarting = boards[board_id].game_over
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        keys.cancel()
+        writer.close()
+
+
+async def spectate(port, board_ids, stop):
+    """
+    One simulated spectator: watch some boards and decode their updates until `stop` is set.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for board_id in board_ids:
+        writer.write(server.COMMAND.pack(server.WATCH, board_id))
+    boards = {}
+    try:
+        while not stop.is_set():
+            await server.read_message(reader, boards)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def simulate(port, first, num_players, num_spectators, boards_per_spectator, actions_per_second, connection):
+    """
+    Run some of the simulated clients, connecting a few at a time, then hand back
+    their input latencies when told to.
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    latencies = []
+    welcomed = []
+    tasks = []
+    for seed in range(first, first + num_players):
+        tasks.append(asyncio.create_task(play(port, seed, actions_per_second, latencies, welcomed, stop)))
+        if len(tasks) % 50 == 0:
+            await asyncio.sleep(0.01)
+    # Spectators watch this process's boards, so wait until they all exist.
+    while len(welcomed) < num_players:
+        await asyncio.sleep(0.01)
+    generator = random.Random(first)
+    for _ in range(num_spectators):
+        board_ids = generator.sample(welcomed, min(boards_per_spectator, len(welcomed)))
+        tasks.append(asyncio.create_task(spectate(port, board_ids, stop)))
+    connection.send(None)
+    await loop.run_in_executor(None, connection.recv)
+    latencies.clear()
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    connection.send(None)
+    await loop.run_in_executor(None, connection.recv)
+    connection.send((latencies[:], (time.process_time() - cpu) / (time.perf_counter() - wall)))
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def run_clients(*args):
+    """
+    Entry point of a client process.
+    """
+    asyncio.run(simulate(*args))
+
+
+def measure(num_boards, args):
+    """
+    Run the server under one load and measure it.
+
+    Args:
+        num_boards (int): Boards, one per simulated player.
+        args (argparse.Namespace): The test's options.
+
+    Returns:
+        dict: The server's statistics, plus input latency p99 in milliseconds and the
+            clients' CPU use as a fraction of one core per client process.
+    """
+    parent, child = multiprocessing.Pipe()
+    host_process = multiprocessing.Process(target=run_server, args=(args.send_rate, child), daemon=True)
+    host_process.start()
+    port = parent.recv()
+    num_spectators = num_boards // args.boards_per_spectator // 4
+    clients = []
+    for index in range(args.processes):
+        players = num_boards * (index + 1) // args.processes - num_boards * index // args.processes
+        spectators = num_spectators * (index + 1) // args.processes - num_spectators * index // args.processes
+        client_parent, client_child = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=run_clients, daemon=True,
+            args=(port, num_boards * index // args.processes + 1, players, spectators, args.boards_per_spectator,
+                  args.actions_per_second, client_child))
+        process.start()
+        clients.append((process, client_parent))
+    for _, connection in clients:
+        connection.recv()
+    # Let every client connect and the boards fill up a little before measuring.
+    time.sleep(args.warmup)
+    for _, connection in clients:
+        connection.send("measure")
+    parent.send("measure")
+    for _, connection in clients:
+        connection.recv()
+    parent.recv()
+    time.sleep(args.seconds)
+    parent.send("stats")
+    stats = parent.recv()
+    latencies = []
+    client_cpu = 0.0
+    for _, connection in clients:
+        connection.send("stats")
+    for _, connection in clients:
+        client_latencies, cpu = connection.recv()
+        latencies += client_latencies
+        client_cpu = max(client_cpu, cpu)
+    # Clients disconnect first, so the server's connections end the way they normally would.
+    for process, _ in clients:
+        process.join()
+    parent.send("stop")
+    host_process.join()
+    stats["input_latency"] = percentile(latencies, 0.99) * 1000
+    stats["client_cpu"] = client_cpu
+    return stats
+
+
+def passes(stats):
+    """
+    Returns:
+        bool: Whether the server kept up with the load.
+    """
+    return (stats["cpu"] < MAX_CPU and stats["lateness"] <= MAX_LATENESS_MS
+            and stats["input_latency"] <= MAX_INPUT_LATENCY_MS and stats["dropped_clients"] == 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find how many boards the server hosts per core.")
+    parser.add_argument("--start", type=int, default=250, help="boards in the first load")
+    parser.add_argument("--seconds", type=float, default=5, help="length of each measurement")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds before each measurement starts")
+    parser.add_argument("--actions-per-second", type=float, default=4, help="key presses per player per second")
+    parser.add_argument("--boards-per-spectator", type=int, default=4,
+                        help="boards each spectator watches; there is one spectator per four boards' worth")
+    parser.add_argument("--send-rate", type=float, default=60, help="the server's --send-rate")
+    parser.add_argument("--processes", type=int, default=max(1, multiprocessing.cpu_count() - 1),
+                        help="client processes")
+    parser.add_argument("--bisect", type=int, default=3, help="bisection steps after the first failing load")
+    args = parser.parse_args()
+
+    print(f"{'boards':>7} {'server CPU':>11} {'drops/s':>9} {'updates/s':>10} {'KiB/s':>8} "
+          f"{'late p99':>9} {'input p99':>10} {'client CPU':>11}")
+    results = {}
+
+    def run(num_boards):
+        stats = measure(num_boards, args)
+        results[num_boards] = stats
+        print(f"{num_boards:>7} {stats['cpu']:>11.0%} {stats['drops']:>9,.0f} {stats['updates']:>10,.0f} "
+              f"{stats['kib']:>8,.0f} {stats['lateness']:>6.1f} ms {stats['input_latency']:>7.1f} ms "
+              f"{stats['client_cpu']:>11.0%}  {'ok' if passes(stats) else 'FAIL'}", flush=True)
+        return passes(stats)
+
+    passed, failed = 0, args.start
+    while run(failed):
+        passed, failed = failed, failed * 2
+    for _ in range(args.bisect):
+        middle = (passed + failed) // 2
+        if middle in (passed, failed):
+            break
+        if run(middle):
+            passed = middle
+        else:
+            failed = middle
+
+    if passed:
+        stats = results[passed]
+        print(f"\nmost boards that kept up: {passed} ({stats['cpu']:.0%} of a core)")
+        print(f"server CPU per board {stats['cpu'] / passed * 1e6:.0f} us/s, "
+              f"about {passed / stats['cpu'] * MAX_CPU:,.0f} boards per core at {MAX_CPU:.0%}")
+    else:
+        print(f"\neven {args.start} boards were too many; try a smaller --start")
+    if max(stats["client_cpu"] for stats in results.values()) > MAX_CPU:
+        print("the clients saturated their cores, so latencies include client delay; use a machine with more cores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Measure how long Drop Block takes to show its first frame.
+
+Starts DropBlock.py --startup-check several times with SDL's dummy video and audio
+drivers: once without the decoded sound cache, so the MP3s are decoded, then with it.
+Each run is timed from launching the process, which includes starting the interpreter,
+to the game's line saying the first frame is shown. Prints each run's time and startup
+report (whose own figure starts once DropBlock.py runs) and the median time from
+launch, and exits with status 1 if the median is over the budget or a run failed:
+
+    python benchmarks/startup.py [runs]
+"""
+import glob
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from DropBlock import STARTUP_BUDGET
+
+
+def start_once():
+    """
+    Start the game once and let it quit after its first frame.
+
+    Returns:
+        tuple[float, str]: Seconds from launch to the first frame, and the startup report;
+            None and the reason instead if the game failed.
+    """
+    environment = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    launched = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join("src", "DropBlock.py"), "--startup-check"],
+                               cwd=ROOT, env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # pygame prints its banner first, so read up to the game's line, or to the end if it never comes.
+    line = ""
+    for line in process.stdout:
+        if line.strip() == "first frame shown":
+            break
+    seconds = time.perf_counter() - launched
+    output, errors = process.communicate()
+    lines = output.strip().splitlines()
+    if line.strip() != "first frame shown" or not lines or process.returncode not in (0, 1):
+        return None, f"exited with status {process.returncode}:\n{errors.strip() or '(no output)'}"
+    return seconds, lines[-1]
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for cache in glob.glob(os.path.join(ROOT, "sounds", "*.pcm")):
+        os.remove(cache)
+    times = []
+    for run in range(runs):
+        seconds, report = start_once()
+        if seconds is None:
+            print(f"run {run + 1} failed, {report}")
+            sys.exit(1)
+        times.append(seconds)
+        print(f"{'cold' if run == 0 else 'warm'}: {seconds * 1000:.0f} ms from launch; {report}")
+    median = statistics.median(times)
+    print(f"median first frame {median * 1000:.0f} ms from launch (budget {STARTUP_BUDGET * 1000:.0f} ms)")
+    sys.exit(0 if median <= STARTUP_BUDGET else 1)
@@ -0,0 +1,297 @@
+"""
+Benchmark suite for the engine and renderer, for CI machines without a display.
+
+Times the hot paths (row clearing on worst-case boards, the collision checks, cell
+positions, piece draws), a whole scripted game played headlessly and one frame of
+the DropBlock.py draw path with SDL's dummy video and audio drivers. Each result is
+the best of several rounds, in microseconds per operation. Results are written as
+JSON and compared against benchmarks/baseline.json, relative to a plain-Python
+calibration loop timed in the same run so the baseline carries across machines; any
+benchmark slower than its baseline by more than the tolerance is reported and the run
+exits with status 1:
+
+    python benchmarks/suite.py [--json results.json] [--tolerance 0.3] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import actions
+from blocks import IPiece
+from game import Game
+from grid import Grid
+from timing import FixedTimestep
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+CALIBRATION = "calibration"
+
+
+def worst_case_grid(num_rows=20, num_cols=10):
+    """
+    Build the board that makes clear_full_rows do the most work: four full rows at the
+    bottom and every row above them filled except one cell, so all of them move.
+
+    Returns:
+        Grid: The board.
+    """
+    grid = Grid(num_rows, num_cols)
+    rng = random.Random(0)
+    for row in range(grid.num_rows):
+        gap = -1 if row >= grid.num_rows - 4 else rng.randrange(grid.num_cols)
+        for column in range(grid.num_cols):
+            if column != gap:
+                grid.set_cell(row, column, rng.randint(1, 7))
+    return grid
+
+
+def mid_game(seed=0, num_rows=20, num_cols=10):
+    """
+    Build a game with the bottom half of the board randomly filled.
+
+    Returns:
+        Game: The game.
+    """
+    rng = random.Random(seed)
+    game = Game(seed=seed, grid=Grid(num_rows, num_cols))
+    for row in range(game.grid.num_rows // 2, game.grid.num_rows):
+        for column in range(game.grid.num_cols):
+            if rng.random() < 0.7:
+                game.grid.set_cell(row, column, rng.randint(1, 7))
+    return game
+
+
+def bench_calibration(number):
+    """
+    A fixed amount of plain Python work. The other results are compared relative to it,
+    so a baseline recorded on one machine still applies on a faster or slower one.
+    """
+    start = time.perf_counter()
+    for _ in range(number):
+        total = 0
+        for value in range(100):
+            total += value * value
+    return time.perf_counter() - start
+
+
+def bench_clear_full_rows(number, num_rows=20, num_cols=10):
+    grid = worst_case_grid(num_rows, num_cols)
+    grids = [grid.copy() for _ in range(number)]
+    candidates = range(grid.num_rows - 4, grid.num_rows)
+    start = time.perf_counter()
+    for grid in grids:
+        grid.clear_full_rows(candidates)
+    return time.perf_counter() - start
+
+
+def bench_block_fits(number):
+    game = mid_game()
+    block = game.current_block
+    block_inside = game.block_inside
+    block_fits = game.block_fits
+    start = time.perf_counter()
+    for step in range(number):
+        block.row_offset = step % 17
+        block_inside() and block_fits()
+    return time.perf_counter() - start
+
+
+def bench_get_cell_position(number):
+    block = IPiece()
+    start = time.perf_counter()
+    for _ in range(number):
+        block.get_cell_position()
+    return time.perf_counter() - start
+
+
+def bench_get_random_block(number):
+    game = Game(seed=0)
+    get_random_block = game.get_random_block
+    start = time.perf_counter()
+    for _ in range(number):
+        get_random_block()
+    return time.perf_counter() - start
+
+
+def bench_scripted_game(number, num_rows=20, num_cols=10):
+    """
+    Play `number` ticks of a game from a fixed seed and input script, resetting after a game over.
+    """
+    script = random.Random(1)
+    codes = [script.choice((0, 0, actions.MOVE_LEFT, actions.MOVE_RIGHT, actions.MOVE_DOWN, actions.ROTATE))
+             for _ in range(997)]
+    game = Game(seed=1, grid=Grid(num_rows, num_cols))
+    tick_ms = FixedTimestep(240).tick_ms
+    start = time.perf_counter()
+    for step in range(number):
+        code = codes[step % 997]
+        if code:
+            game.apply_action(code)
+        game.tick(tick_ms)
+        if game.game_over:
+            game.apply_action(actions.RESET)
+    return time.perf_counter() - start
+
+
+class FrameBenchmarks:
+    """
+    One frame of the DropBlock.py draw path: Renderer.draw onto the viewport's canvas and
+    Viewport.present of the rectangles it returns, on the dummy video driver.
+    """
+    def __init__(self, num_rows=20, num_cols=10, cell_size=30):
+        import pygame
+        from renderer import Renderer
+        pygame.display.init()
+        pygame.font.init()
+        self.renderer = Renderer(num_rows, num_cols, cell_size)
+        self.viewport = None
+        self.scale = None
+        self.game = mid_game(0, num_rows, num_cols)
+
+    def use_scale(self, scale):
+        """
+        Open the window at a multiple of the logical size, unless it is already open at that size.
+
+        Args:
+            scale (float): Size of the window as a multiple of the logical size.
+        """
+        from viewport import Viewport
+        if scale != self.scale:
+            self.viewport = Viewport(self.renderer.window_size, scale, regions=self.renderer.regions)
+            self.scale = scale
+            self.renderer.invalidate()
+            self.frame()
+
+    def frame(self):
+        self.viewport.present(self.renderer.draw(self.viewport.canvas, self.game))
+
+    def bench_full_repaint(self, number):
+        self.use_scale(1)
+        start = time.perf_counter()
+        for _ in range(number):
+            self.renderer.invalidate()
+            self.frame()
+        return time.perf_counter() - start
+
+    def bench_after_move(self, number, scale=1):
+        self.use_scale(scale)
+        moves = (self.game.move_left, self.game.move_right)
+        start = time.perf_counter()
+        for step in range(number):
+            moves[step % 2]()
+            self.frame()
+        return time.perf_counter() - start
+
+    def bench_after_move_2x(self, number):
+        return self.bench_after_move(number, 2)
+
+    def bench_after_move_1_5x(self, number):
+        return self.bench_after_move(number, 1.5)
+
+
+def run_suite(rounds=7):
+    """
+    Run every benchmark. Each benchmark function takes a count, performs that many
+    operations and returns the seconds they took, so its setup is left out of the timing.
+
+    Args:
+        rounds (int): Times each benchmark is run; the fastest is kept.
+
+    Returns:
+        dict: Microseconds per operation, keyed by benchmark name.
+    """
+    frames = FrameBenchmarks()
+    benchmarks = {
+        CALIBRATION: (bench_calibration, 20_000),
+        "grid.clear_full_rows worst case": (bench_clear_full_rows, 2_000),
+        "game.block_inside + block_fits": (bench_block_fits, 100_000),
+        "block.get_cell_position": (bench_get_cell_position, 100_000),
+        "game.get_random_block": (bench_get_random_block, 50_000),
+        "scripted game, per tick": (bench_scripted_game, 50_000),
+        "frame, full repaint": (frames.bench_full_repaint, 200),
+        "frame, after one move": (frames.bench_after_move, 1_000),
+        "frame, after one move, window 2x": (frames.bench_after_move_2x, 1_000),
+        "frame, after one move, window 1.5x": (frames.bench_after_move_1_5x, 100),
+    }
+    # Every benchmark runs once per round and keeps its fastest round. Interleaving the
+    # rounds spreads each benchmark over the whole run, so a burst of load or a clock
+    # change on the machine cannot skew one benchmark against the others.
+    best = {}
+    for _ in range(rounds):
+        for name, (run, number) in benchmarks.items():
+            cost = run(number) / number * 1e6
+            best[name] = min(cost, best.get(name, cost))
+    return {name: round(cost, 3) for name, cost in best.items()}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Find the benchmarks that got slower than the baseline allows. Costs are compared as
+    multiples of each run's calibration result, which takes out the machine's overall speed.
+
+    Args:
+        results (dict): This run's microseconds per operation.
+        baseline (dict): The stored microseconds per operation.
+        tolerance (float): Allowed slowdown as a fraction, e.g. 0.3 for 30%.
+
+    Returns:
+        list[str]: One message per regression.
+    """
+    regressions = []
+    scale = results[CALIBRATION] / baseline[CALIBRATION]
+    for name, cost in results.items():
+        expected = baseline.get(name)
+        if name == CALIBRATION or expected is None:
+            continue
+        slowdown = cost / (expected * scale) - 1
+        if slowdown > tolerance:
+            regressions.append(f"{name}: {cost:.3f} us, baseline {expected:.3f} us "
+                               f"({slowdown:+.0%} after scaling by calibration)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop Block benchmark suite")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to this file")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown before failing, as a fraction")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    results = run_suite()
+    report = {"python": platform.python_version(), "machine": platform.machine(),
+              "unit": "us/op", "results": results}
+    for name, cost in results.items():
+        print(f"{name:35} {cost:12.3f} us/op")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline to create one")
+        return 1
+    with open(args.baseline) as file:
+        baseline = json.load(file)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print("REGRESSION", message)
+    if regressions:
+        return 1
+    print(f"no regressions beyond {args.tolerance:.0%} of the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
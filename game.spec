@@ -1,9 +1,11 @@
 # -*- mode: python ; coding: utf-8 -*-
+# One-folder build: nothing has to be unpacked to a temporary folder on each launch,
+# and the decoded sound cache can be written next to the bundled sounds.
 
 
 a = Analysis(
-    ['src/game.py'],
-    pathex=[],
+    ['src/DropBlock.py'],
+    pathex=['src'],
     binaries=[],
     datas=[('sounds/*.mp3', 'sounds/')],
     hiddenimports=[],
@@ -19,16 +21,13 @@ pyz = PYZ(a.pure)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
-    name='game',
+    exclude_binaries=True,
+    name='DropBlock',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
     upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
     console=True,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +35,13 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    name='DropBlock',
+)
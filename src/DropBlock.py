@@ -1,99 +1,235 @@
+import time
+
+# Taken before pygame is imported, which is most of the time it takes to start. The
+# interpreter's own startup comes before this, so times from here understate the wait
+# from launch; benchmarks/startup.py times that from outside the process.
+STARTED = time.perf_counter()
+
+import argparse
+import multiprocessing
 import pygame
 import sys
-from game import Game
-from colours import Colours
+import actions
+from bot import Autoplayer, Bot
+from game import MAX_SEED, Game
+from grid import Grid
 from controls import Controls
-
-pygame.init()
-
-# --- Fonts and UI setup ---
-game_font = pygame.font.Font(None, 40)
-game_over_font = pygame.font.Font(None, 60)
-
-score_surface = game_font.render("Score", True, Colours.text_white)
-score_rect = pygame.Rect(320, 55, 170, 60)
-level_surface = game_font.render("Level", True, Colours.text_white)
-level_rect = pygame.Rect(320, 175, 170, 60)
-lines_surface = game_font.render("Lines", True, Colours.text_white)
-lines_rect = pygame.Rect(320, 295, 170, 60)
-next_rect = pygame.Rect(320, 415, 170, 180)
-game_over_surface = game_over_font.render("Game Over!", True, Colours.text_black)
-
-# --- Window setup ---
-screen = pygame.display.set_mode((500, 620))
-pygame.display.set_caption("Drop Block!")
-clock = pygame.time.Clock()
-
-# --- Game setup ---
-controls = Controls()
-game = Game()
-
-# --- Setup game drop timer ---
-GAME_UPDATE = pygame.USEREVENT
-pygame.time.set_timer(GAME_UPDATE, game.get_drop_speed()) 
-
-while True:
-    events = pygame.event.get()
-
-    actions = controls.get_actions(events)
-
-    if actions["quit"]:
+from hud import ProfilerOverlay
+from profiler import CONTROLS, DISPLAY, DRAW, EVENTS, LOGIC, FrameProfiler
+from renderer import Renderer
+from replay import ReplayRecorder
+from sounds import PygameSounds
+from timing import CpuMeter, FixedTimestep
+from viewport import Viewport
+
+# Longest the loop blocks waiting for input while nothing is animating, in milliseconds.
+IDLE_TIMEOUT_MS = 500
+# Longest it should take from starting Python to showing the first frame, in seconds.
+STARTUP_BUDGET = 0.75
+
+
+def startup_report(startup_seconds, sounds):
+    """
+    Summarise how long startup took.
+
+    Args:
+        startup_seconds (float): Seconds from STARTED until the first frame was shown.
+        sounds (PygameSounds): The sound backend, whose loading time is included.
+
+    Returns:
+        str: Time to the first frame against STARTUP_BUDGET, then how the sounds loaded.
+    """
+    report = (f"first frame {startup_seconds * 1000:.0f} ms after DropBlock.py started "
+              f"(budget {STARTUP_BUDGET * 1000:.0f} ms)")
+    if startup_seconds > STARTUP_BUDGET:
+        report += ", OVER BUDGET"
+    if sounds.loaded.wait(5):
+        report += (f", mixer and sounds loaded in {sounds.load_seconds * 1000:.1f} ms "
+                   f"({len(sounds.sounds)} of {len(sounds.FILES)} loaded, {sounds.cached} from cache)")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop Block!")
+    parser.add_argument("--tick-rate", type=int, default=240, help="logic and input ticks per second")
+    parser.add_argument("--fps", type=int, default=60, help="frames drawn per second, 0 for uncapped")
+    parser.add_argument("--das", type=float, default=150, help="milliseconds before left/right auto-repeat starts")
+    parser.add_argument("--arr", type=float, default=50, help="milliseconds between left/right auto-repeats")
+    parser.add_argument("--autoplay", action="store_true", help="let the bot play (attract mode)")
+    parser.add_argument("--beam", type=int, default=8, help="bot beam width; wide beams use every core")
+    parser.add_argument("--timing", action="store_true",
+                        help="print measured tick and frame rates and CPU use while playing and idle on exit")
+    parser.add_argument("--seed", type=int, help="seed for the piece sequence, random by default")
+    parser.add_argument("--record", metavar="PATH", help="record the session to a replay file")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="time each phase of every frame and write it on exit (.csv, otherwise a Chrome trace)")
+    parser.add_argument("--rows", type=int, default=20, help="rows of the board")
+    parser.add_argument("--cols", type=int, default=10, help="columns of the board")
+    parser.add_argument("--cell-size", type=int, default=30, help="width and height of a cell in pixels")
+    parser.add_argument("--scale", type=float, default=1,
+                        help="window size as a multiple of the board and panels' size")
+    parser.add_argument("--fullscreen", action="store_true", help="start in fullscreen (F11 toggles it)")
+    parser.add_argument("--startup-check", action="store_true",
+                        help="show the first frame, print the startup time and exit, with status 1 if over budget")
+    args = parser.parse_args()
+    if args.seed is not None and not 0 <= args.seed < MAX_SEED:
+        parser.error(f"--seed must be in range(0, 2**64), got {args.seed}")
+
+    # Only the subsystems the game uses. The sounds bring up the mixer on their loader
+    # thread while the window opens, and Controls brings up joysticks after the first frame.
+    pygame.display.init()
+    pygame.font.init()
+    sounds = PygameSounds()
+
+    # --- Window setup ---
+    # The renderer lays out the board and panels at a fixed logical size; the viewport
+    # scales that into the window, whatever size the window is.
+    renderer = Renderer(args.rows, args.cols, args.cell_size)
+    viewport = Viewport(renderer.window_size, args.scale, args.fullscreen, renderer.regions)
+    pygame.display.set_caption("Drop Block!")
+
+    # --- Game setup ---
+    game = Game(sounds=sounds, seed=args.seed, grid=Grid(args.rows, args.cols))
+    # The first frame goes up before the rest of the setup so the window appears as early as possible.
+    viewport.present(renderer.draw(viewport.canvas, game))
+    startup_seconds = time.perf_counter() - STARTED
+    if args.startup_check:
+        # A line straight away, so whoever launched the game can time the first frame from the launch.
+        print("first frame shown", flush=True)
+        print(startup_report(startup_seconds, sounds))
+        sounds.close()
         pygame.quit()
-        sys.exit()
-
-    # Handle pause / reset
-    if actions["pause_toggle"]:
-        game.paused = not game.paused
-    if actions["reset"]:
-        game.reset()
-        pygame.time.set_timer(GAME_UPDATE, game.get_drop_speed())
-
-    # Only move blocks if not paused or game over
-    if not game.paused and not game.game_over:
-        if actions["move_left"]:
-            game.move_left()
-        if actions["move_right"]:
-            game.move_right()
-        if actions["move_down"]:
-            game.move_down()
-        if actions["rotate"]:
-            game.rotate()
-
-    for event in events:
-        if event.type == GAME_UPDATE and not game.paused and not game.game_over:
-            game.move_down()
-            pygame.time.set_timer(GAME_UPDATE, game.get_drop_speed())
-    
-    # --- Drawing ---
-    screen.fill(Colours.board_colour)
-
-    # Score
-    pygame.draw.rect(screen, Colours.board_colour_light, score_rect, 0, 10)
-    screen.blit(score_surface, (365, 20))
-    score_value_surface = game_font.render(str(game.score), True, Colours.text_white)
-    screen.blit(score_value_surface, score_value_surface.get_rect(center=score_rect.center))
-
-    # Level
-    pygame.draw.rect(screen, Colours.board_colour_light, level_rect, 0, 10)
-    screen.blit(level_surface, (365, 140))
-    level_value_surface = game_font.render(str(game.level), True, Colours.text_white)
-    screen.blit(level_value_surface, level_value_surface.get_rect(center=level_rect.center))
-
-    # Lines
-    pygame.draw.rect(screen, Colours.board_colour_light, lines_rect, 0, 10)
-    screen.blit(lines_surface, (365, 260))
-    lines_value_surface = game_font.render(str(game.total_lines_cleared), True, Colours.text_white)
-    screen.blit(lines_value_surface, lines_value_surface.get_rect(center=lines_rect.center))
-
-    # Next
-    pygame.draw.rect(screen, Colours.board_colour_light, next_rect, 0, 10)
-
-    # Game board
-    game.draw(screen)
-
-    # --- Game over overlay ---
-    if game.game_over:
-        screen.blit(game_over_surface, (40, 277))
-
-    pygame.display.update()
-    clock.tick(30)
+        sys.exit(0 if startup_seconds <= STARTUP_BUDGET else 1)
+
+    controls = Controls(das=args.das, arr=args.arr)
+    recorder = ReplayRecorder(game, args.tick_rate) if args.record else None
+    autoplayer = Autoplayer(Bot(beam_width=args.beam)) if args.autoplay else None
+
+    # --- Profiler ---
+    # Off unless --profile is given or F3 is pressed; while off each phase costs one None check.
+    profiler = FrameProfiler() if args.profile else None
+    overlay = None
+
+    # --- Setup fixed timestep ---
+    # Input and game logic (including gravity) run once per tick; drawing runs at its own rate.
+    timestep = FixedTimestep(args.tick_rate)
+    frame_seconds = 1 / args.fps if args.fps > 0 else 0
+    next_frame = time.perf_counter()
+    start_time = time.perf_counter()
+    frames = 0
+    game_over_ticks = 0
+    cpu = CpuMeter()
+    # The event that woke the loop from idle, handled before any that arrived after it.
+    pending = []
+
+    while True:
+        for _ in range(timestep.pending()):
+            if profiler:
+                mark = time.perf_counter()
+            events = pygame.event.get()
+            if pending:
+                events = pending + events
+                pending = []
+            if profiler:
+                mark = profiler.record(EVENTS, mark)
+
+            controls.update(events)
+            if profiler:
+                mark = profiler.record(CONTROLS, mark)
+            while controls.queue:
+                timestamp, action = controls.queue.popleft()
+                if action == actions.TOGGLE_PROFILER:
+                    if overlay:
+                        overlay = None
+                        # Without --profile nothing needs the timings once the overlay is gone.
+                        if not args.profile:
+                            profiler = None
+                    else:
+                        overlay = ProfilerOverlay(pygame.font.Font(None, 22))
+                        if profiler is None:
+                            profiler = FrameProfiler()
+                            mark = time.perf_counter()
+                    renderer.invalidate()
+                    continue
+                if action == actions.TOGGLE_FULLSCREEN:
+                    viewport.toggle_fullscreen()
+                    renderer.invalidate()
+                    continue
+                if action == actions.QUIT:
+                    if args.timing:
+                        cpu.update("playing")
+                        print(timestep.report(time.perf_counter() - start_time, frames))
+                        print(cpu.report())
+                        print(startup_report(startup_seconds, sounds))
+                        print(sounds.report())
+                    if args.profile:
+                        profiler.export(args.profile)
+                    if recorder is not None:
+                        recorder.save(args.record)
+                    if autoplayer is not None:
+                        autoplayer.bot.close()
+                    sounds.close()
+                    pygame.quit()
+                    sys.exit()
+                game.apply_action(action)
+
+            for event in events:
+                if event.type in (pygame.WINDOWSIZECHANGED, pygame.WINDOWEXPOSED):
+                    viewport.resized()
+                    renderer.invalidate()
+
+            if autoplayer is not None:
+                autoplayer.update(game)
+                # Attract mode: start a new game a few seconds after the bot loses.
+                game_over_ticks = game_over_ticks + 1 if game.game_over else 0
+                if game_over_ticks > 3 * args.tick_rate:
+                    game.apply_action(actions.RESET)
+
+            # Gravity
+            game.tick(timestep.tick_ms)
+            if profiler:
+                profiler.record(LOGIC, mark)
+
+        # Nothing moves while paused, or after game over unless the bot will restart the game.
+        idle = game.paused or (game.game_over and autoplayer is None)
+
+        # --- Drawing ---
+        now = time.perf_counter()
+        if now >= next_frame or idle:
+            # Only the regions that changed are redrawn and pushed to the display.
+            dirty_rects = renderer.draw(viewport.canvas, game, profiler)
+            if overlay:
+                dirty_rects.append(overlay.draw(viewport.canvas, profiler, now))
+            if profiler:
+                mark = profiler.record(DRAW, now)
+            viewport.present(dirty_rects)
+            if profiler:
+                profiler.record(DISPLAY, mark)
+                profiler.end_frame()
+            frames += 1
+            next_frame = max(next_frame + frame_seconds, now)
+
+        if idle:
+            # Block until input arrives instead of ticking and drawing an unchanging scene.
+            # The event is kept and handled first on the next tick, ahead of anything that arrived
+            # after it, and the time spent waiting is not owed as ticks.
+            cpu.update("playing")
+            event = pygame.event.wait(IDLE_TIMEOUT_MS)
+            if event.type != pygame.NOEVENT:
+                pending.append(event)
+            cpu.update("idle")
+            timestep.resync()
+            next_frame = time.perf_counter()
+            continue
+
+        # Sleep until the next tick or frame is due, whichever comes first.
+        wait = timestep.time_to_next_tick()
+        if frame_seconds:
+            wait = min(wait, next_frame - time.perf_counter())
+        if wait > 0:
+            time.sleep(wait)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,16 @@
+"""
+Action codes shared by input handling and game logic.
+Kept free of pygame so headless code (bots, replays) can use them.
+"""
+
+MOVE_LEFT = 1
+MOVE_RIGHT = 2
+MOVE_DOWN = 3
+ROTATE = 4
+PAUSE_TOGGLE = 5
+RESET = 6
+QUIT = 7
+
+# Interface only: handled by the main loop, never passed to Game.
+TOGGLE_PROFILER = 8
+TOGGLE_FULLSCREEN = 9
@@ -0,0 +1,243 @@
+import random
+import numpy as np
+import actions
+from blocks import PIECES, spawn_shift
+
+# Per-piece tables in PIECES order, used to index every board's piece at once.
+# Spawn columns are for a standard-width board and are shifted by spawn_shift().
+PIECE_IDS = np.array([piece().id for piece in PIECES], dtype=np.uint8)
+# PIECE_CELLS[piece, rotation] holds the (row, column) offsets of the piece's four cells.
+PIECE_CELLS = np.array([[rotation.cells for rotation in piece.rotations] for piece in PIECES], dtype=np.int64)
+SPAWN_ROWS = np.array([piece().row_offset for piece in PIECES], dtype=np.int64)
+SPAWN_COLUMNS = np.array([piece().column_offset for piece in PIECES], dtype=np.int64)
+NUM_ROTATIONS = PIECE_CELLS.shape[1]
+# Points for clearing 0-4 rows at once, before multiplying by level + 1, as in Game.update_score.
+LINE_SCORES = np.array([0, 40, 100, 300, 1200], dtype=np.int64)
+
+
+class BatchGame:
+    """
+    Many games stepped together with NumPy, for evaluating bots and their parameters.
+
+    Board b is `cells[b]`, a (rows, columns) plane of block IDs laid out like Grid.cells,
+    and its falling piece is described by `piece[b]` (index into PIECES), `rotation[b]`,
+    `row[b]` and `column[b]`. Moves, collision checks, locking, row clearing and scoring
+    run on every board at once with array operations and follow the same rules as Game,
+    so board b plays exactly like `Game(seed=seeds[b])` given the same actions and ticks.
+
+    Each board draws its pieces from its own random.Random and bag, the same way
+    Game.get_random_block does; that is the only per-board Python, and it only runs
+    when a piece locks.
+    """
+    def __init__(self, seeds, num_rows=20, num_cols=10):
+        """
+        Args:
+            seeds (list[int]): One seed per board, as passed to Game.
+            num_rows (int): Rows per board.
+            num_cols (int): Columns per board.
+        """
+        self.size = len(seeds)
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.spawn_shift = spawn_shift(num_cols)
+        self.seeds = list(seeds)
+        self.randoms = [random.Random(seed) for seed in self.seeds]
+        self.bags = [list(range(len(PIECES))) for _ in self.seeds]
+        self.cells = np.zeros((self.size, num_rows, num_cols), dtype=np.uint8)
+        self.piece = np.zeros(self.size, dtype=np.int64)
+        self.next_piece = np.zeros(self.size, dtype=np.int64)
+        self.rotation = np.zeros(self.size, dtype=np.int64)
+        self.row = np.zeros(self.size, dtype=np.int64)
+        self.column = np.zeros(self.size, dtype=np.int64)
+        self.score = np.zeros(self.size, dtype=np.int64)
+        self.level = np.zeros(self.size, dtype=np.int64)
+        self.total_lines_cleared = np.zeros(self.size, dtype=np.int64)
+        self.gravity_timer = np.zeros(self.size, dtype=np.float64)
+        self.paused = np.zeros(self.size, dtype=bool)
+        self.game_over = np.zeros(self.size, dtype=bool)
+        self.ticks = 0
+        for board in range(self.size):
+            self.next_piece[board] = self.draw_piece(board)
+            self.spawn(board)
+            self.next_piece[board] = self.draw_piece(board)
+
+    def draw_piece(self, board):
+        """
+        Take a random piece from a board's bag, refilling it when only four remain.
+
+        Args:
+            board (int): The board drawing a piece.
+
+        Returns:
+            int: Index of the piece in PIECES.
+        """
+        if len(self.bags[board]) == 4:
+            self.bags[board] = list(range(len(PIECES)))
+        piece = self.randoms[board].choice(self.bags[board])
+        self.bags[board].remove(piece)
+        return piece
+
+    def spawn(self, board):
+        """
+        Make a board's next piece its falling piece, at its starting position.
+
+        Args:
+            board (int): The board.
+        """
+        piece = self.next_piece[board]
+        self.piece[board] = piece
+        self.rotation[board] = 0
+        self.row[board] = SPAWN_ROWS[piece]
+        self.column[board] = SPAWN_COLUMNS[piece] + self.spawn_shift
+
+    def fits(self, boards, rotation, row, column):
+        """
+        Check whether each board's piece is inside the board and clear of filled cells
+        in the given state.
+
+        Args:
+            boards (np.ndarray): Indices of the boards to check.
+            rotation (np.ndarray): Rotation state to check for each board.
+            row (np.ndarray): Row offset to check for each board.
+            column (np.ndarray): Column offset to check for each board.
+
+        Returns:
+            np.ndarray: One bool per board, True where the piece fits.
+        """
+        cells = PIECE_CELLS[self.piece[boards], rotation]
+        rows = row[:, None] + cells[:, :, 0]
+        columns = column[:, None] + cells[:, :, 1]
+        inside = ((rows >= 0) & (rows < self.num_rows) & (columns >= 0) & (columns < self.num_cols)).all(axis=1)
+        occupied = self.cells[boards[:, None], rows.clip(0, self.num_rows - 1), columns.clip(0, self.num_cols - 1)]
+        return inside & ~occupied.any(axis=1)
+
+    def try_move(self, boards, rows, columns, rotations):
+        """
+        Move or rotate the pieces on some boards, leaving any that would not fit where they were.
+
+        Args:
+            boards (np.ndarray): Indices of the boards to move.
+            rows (int): Rows to move down.
+            columns (int): Columns to move right (negative moves left).
+            rotations (int): Clockwise rotation steps.
+
+        Returns:
+            np.ndarray: One bool per board, True where the piece moved.
+        """
+        rotation = (self.rotation[boards] + rotations) % NUM_ROTATIONS
+        row = self.row[boards] + rows
+        column = self.column[boards] + columns
+        moved = self.fits(boards, rotation, row, column)
+        boards = boards[moved]
+        self.rotation[boards] = rotation[moved]
+        self.row[boards] = row[moved]
+        self.column[boards] = column[moved]
+        return moved
+
+    def move_down(self, boards):
+        """
+        Move the pieces on some boards down a row, locking those that cannot move.
+
+        Args:
+            boards (np.ndarray): Indices of the boards.
+        """
+        moved = self.try_move(boards, 1, 0, 0)
+        if not moved.all():
+            self.lock(boards[~moved])
+
+    def lock(self, boards):
+        """
+        Lock each board's piece into its cells, spawn the next piece, clear full rows,
+        score them and end any game whose new piece does not fit, as Game.lock_block does.
+
+        Args:
+            boards (np.ndarray): Indices of the boards whose pieces lock.
+        """
+        cells = PIECE_CELLS[self.piece[boards], self.rotation[boards]]
+        self.cells[boards[:, None], self.row[boards, None] + cells[:, :, 0],
+                   self.column[boards, None] + cells[:, :, 1]] = PIECE_IDS[self.piece[boards], None]
+        for board in boards.tolist():
+            self.spawn(board)
+            self.next_piece[board] = self.draw_piece(board)
+
+        full = (self.cells[boards] != 0).all(axis=2)
+        cleared = full.sum(axis=1)
+        clearing = cleared > 0
+        if clearing.any():
+            targets = boards[clearing]
+            counts = cleared[clearing]
+            # A stable sort on "kept" moves the full rows to the top and keeps the order of
+            # the rest; the rows that were full are then emptied.
+            order = np.argsort(~full[clearing], axis=1, kind="stable")
+            compacted = np.take_along_axis(self.cells[targets], order[:, :, None], axis=1)
+            compacted[np.arange(self.num_rows)[None, :] < counts[:, None]] = 0
+            self.cells[targets] = compacted
+            self.score[targets] += LINE_SCORES[counts] * (self.level[targets] + 1)
+            self.total_lines_cleared[targets] += counts
+            self.level[targets] = np.maximum(self.level[targets], self.total_lines_cleared[targets] // 10)
+
+        self.game_over[boards] |= ~self.fits(boards, self.rotation[boards], self.row[boards], self.column[boards])
+
+    def reset(self, boards):
+        """
+        Start new games on some boards, as Game.reset does. Their piece generators carry on.
+
+        Args:
+            boards (np.ndarray): Indices of the boards to reset.
+        """
+        self.cells[boards] = 0
+        self.score[boards] = 0
+        self.level[boards] = 0
+        self.total_lines_cleared[boards] = 0
+        for board in np.asarray(boards).tolist():
+            self.bags[board] = list(range(len(PIECES)))
+            self.next_piece[board] = self.draw_piece(board)
+            self.spawn(board)
+            self.next_piece[board] = self.draw_piece(board)
+        self.paused[boards] = False
+        self.game_over[boards] = False
+        self.gravity_timer[boards] = 0
+
+    def get_drop_speed(self):
+        """
+        Returns:
+            np.ndarray: Each board's drop interval in milliseconds, as Game.get_drop_speed.
+        """
+        return np.maximum(100, 350 - 25 * self.level)
+
+    def apply_actions(self, codes):
+        """
+        Apply one action to every board, as Game.apply_action does for one game.
+
+        Args:
+            codes (np.ndarray): One action code per board; 0 leaves a board alone.
+        """
+        codes = np.asarray(codes)
+        self.paused ^= codes == actions.PAUSE_TOGGLE
+        resetting = np.flatnonzero(codes == actions.RESET)
+        if len(resetting):
+            self.reset(resetting)
+        active = ~self.paused & ~self.game_over
+        self.try_move(np.flatnonzero(active & (codes == actions.MOVE_LEFT)), 0, -1, 0)
+        self.try_move(np.flatnonzero(active & (codes == actions.MOVE_RIGHT)), 0, 1, 0)
+        self.try_move(np.flatnonzero(active & (codes == actions.ROTATE)), 0, 0, 1)
+        self.move_down(np.flatnonzero(active & (codes == actions.MOVE_DOWN)))
+
+    def tick(self, milliseconds):
+        """
+        Advance every running board's gravity timer by one logic tick and drop pieces
+        whose drop interval has elapsed, as Game.tick does.
+
+        Args:
+            milliseconds (float): Length of the tick in milliseconds.
+        """
+        self.ticks += 1
+        active = ~self.paused & ~self.game_over
+        self.gravity_timer[active] += milliseconds
+        while True:
+            drop_speed = self.get_drop_speed()
+            due = np.flatnonzero(active & ~self.game_over & (self.gravity_timer >= drop_speed))
+            if not len(due):
+                break
+            self.gravity_timer[due] -= drop_speed[due]
+            self.move_down(due)
@@ -1,26 +1,69 @@
-from colours import Colours
-import pygame
 from position import Position
 
+class Rotation:
+    """
+    Immutable description of one rotation state of a piece, shared by every piece of that shape.
+    Built once at import so moving, rotating and collision checks never allocate.
+    """
+    __slots__ = ("cells", "min_row", "max_row", "min_column", "max_column", "row_masks", "column_bottoms")
+
+    def __init__(self, cells):
+        """
+        Precompute the bounding box, row masks and lowest cell of each column for a rotation.
+
+        Args:
+            cells (tuple[tuple[int, int]]): (row, column) offsets of the occupied cells.
+        """
+        self.cells = cells
+        self.min_row = min(row for row, column in cells)
+        self.max_row = max(row for row, column in cells)
+        self.min_column = min(column for row, column in cells)
+        self.max_column = max(column for row, column in cells)
+        by_row = {}
+        for row, column in cells:
+            by_row[row] = by_row.get(row, 0) | (1 << column)
+        self.row_masks = tuple(sorted(by_row.items()))
+        bottoms = {}
+        for row, column in cells:
+            bottoms[column] = max(row, bottoms.get(column, row))
+        self.column_bottoms = tuple(sorted(bottoms.items()))
+
+
+def build_rotations(shapes):
+    """
+    Build the shared rotation table for a piece.
+
+    Args:
+        shapes (tuple[tuple[tuple[int, int]]]): (row, column) offsets for each rotation state.
+
+    Returns:
+        tuple[Rotation]: One Rotation per rotation state.
+    """
+    return tuple(Rotation(tuple(cells)) for cells in shapes)
+
+
 class Block:
     """
     Represents a single Piece wth a specific shape and rotation state.
-    Handles movement, rotation, and drawing of the block on the grid.
+    Handles movement and rotation of the block on the grid.
+
+    A piece only holds its ID, rotation state and offset; its shape lives in the
+    class-level `rotations` table which every piece of that shape shares.
     """
+    __slots__ = ("id", "rotation_state", "row_offset", "column_offset")
+    rotations = ()
+
     def __init__(self, id):
         """
         Initialise a piece with a unique ID and its rotation states.
-        
+
         Args:
             id (int): The piece's unique identifier, ie its shape and colour.
         """
         self.id = id
-        self.cells = {}
-        self.cell_size = 30
         self.row_offset = 0
         self.column_offset = 0
         self.rotation_state = 0
-        self.colours = Colours.get_cell_colours()
 
     def move(self, rows, columns):
         """
@@ -33,27 +76,41 @@ class Block:
         self.row_offset += rows
         self.column_offset += columns
 
+    def get_rotation(self):
+        """
+        Get the shared table entry for the piece's current rotation state.
+
+        Returns:
+            Rotation: Cell offsets, bounding box and row masks of the current rotation.
+        """
+        return self.rotations[self.rotation_state]
+
     def get_cell_position(self):
         """
         Get the absolute grid positions of the piece's cells based on its rotation and offset.
-        
+
         Returns:
             list[Position]: A list of Position objects representing the piece's occupied grid cells.
         """
-        tiles = self.cells[self.rotation_state]
-        moved_tiles = []
-        for position in tiles:
-            position = Position(position.row + self.row_offset, position.column + self.column_offset)
-            moved_tiles.append(position)
-        return moved_tiles
-    
+        return [Position(row + self.row_offset, column + self.column_offset)
+                for row, column in self.rotations[self.rotation_state].cells]
+
+    def get_row_masks(self):
+        """
+        Get the piece's current rotation as row bitmasks relative to its offset.
+
+        Returns:
+            tuple[tuple[int, int]]: (row, mask) pairs, bit c of mask set for column c.
+        """
+        return self.rotations[self.rotation_state].row_masks
+
     def rotate(self):
         """
         Rotate the piece to the next rotation state.
         Wraps around when the final rotation state is reached.
         """
         self.rotation_state += 1
-        if self.rotation_state == len(self.cells):
+        if self.rotation_state == len(self.rotations):
             self.rotation_state = 0
 
     def undo_rotate(self):
@@ -63,19 +120,19 @@ class Block:
         """
         self.rotation_state -= 1
         if self.rotation_state == -1:
-            self.rotation_state = len(self.cells) - 1
-    
-    def draw(self, screen, offset_x, offset_y):
+            self.rotation_state = len(self.rotations) - 1
+
+    def copy(self):
         """
-        Draw the piece on the given Pygame surface at the specified screen offset.
-        
-        Args:
-            screen (pygame.Surface): The Pygame surface to draw the piece on.
-            offset_x (int): horizontal offset in pixels for drawing.
-            offset_y (int): vertical offset in pixels for drawing.
-        """
-        tiles = self.get_cell_position()
-        for tile in tiles:
-            tile_rect = pygame.Rect(offset_x+ tile.column * self.cell_size, offset_y + tile.row * self.cell_size,
-                                    self.cell_size -1, self.cell_size -1)
-            pygame.draw.rect(screen, self.colours[self.id], tile_rect)
\ No newline at end of file
+        Make an independent piece of the same shape in the same state.
+        Only the ID, rotation state and offset are copied; the rotation table is shared.
+
+        Returns:
+            Block: The copy.
+        """
+        block = type(self).__new__(type(self))
+        block.id = self.id
+        block.rotation_state = self.rotation_state
+        block.row_offset = self.row_offset
+        block.column_offset = self.column_offset
+        return block
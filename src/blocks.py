@@ -1,79 +1,129 @@
-from block import Block
-from position import Position
+from block import Block, build_rotations
+
+# Spawn columns below are for a board of this width; other widths shift them to stay centred.
+STANDARD_COLUMNS = 10
 
 class LPiece(Block):
+    __slots__ = ()
+    rotations = build_rotations((
+        ((0,2), (1,0), (1,1), (1,2)),
+        ((0,1), (1,1), (2,1), (2,2)),
+        ((1,0), (1,1), (1,2), (2,0)),
+        ((0,0), (0,1), (1,1), (2,1))
+    ))
+
     def __init__(self):
         super().__init__(id = 1)
-        self.cells = {
-            0: [Position(0,2), Position(1,0), Position(1,1), Position(1,2)],
-            1: [Position(0,1), Position(1,1), Position(2,1), Position(2,2)],
-            2: [Position(1,0), Position(1,1), Position(1,2), Position(2,0)],
-            3: [Position(0,0), Position(0,1), Position(1,1), Position(2,1)]
-        }
         self.move(0,3)
 
 class JPiece(Block):
+    __slots__ = ()
+    rotations = build_rotations((
+        ((0,0), (1,0), (1,1), (1,2)),
+        ((0,1), (0,2), (1,1), (2,1)),
+        ((1,0), (1,1), (1,2), (2,2)),
+        ((0,1), (1,1), (2,0), (2,1))
+    ))
+
     def __init__(self):
         super().__init__(id = 2)
-        self.cells = {
-            0: [Position(0,0), Position(1,0), Position(1,1), Position(1,2)],
-            1: [Position(0,1), Position(0,2), Position(1,1), Position(2,1)],
-            2: [Position(1,0), Position(1,1), Position(1,2), Position(2,2)],
-            3: [Position(0,1), Position(1,1), Position(2,0), Position(2,1)]
-        }
         self.move(0,3)
 
 class IPiece(Block):
+    __slots__ = ()
+    rotations = build_rotations((
+        ((1,0), (1,1), (1,2), (1,3)),
+        ((0,2), (1,2), (2,2), (3,2)),
+        ((2,0), (2,1), (2,2), (2,3)),
+        ((0,1), (1,1), (2,1), (3,1))
+    ))
+
     def __init__(self):
         super().__init__(id = 3)
-        self.cells = {
-            0: [Position(1,0), Position(1,1), Position(1,2), Position(1,3)],
-            1: [Position(0,2), Position(1,2), Position(2,2), Position(3,2)],
-            2: [Position(2,0), Position(2,1), Position(2,2), Position(2,3)],
-            3: [Position(0,1), Position(1,1), Position(2,1), Position(3,1)]
-        }
         self.move(-1,3)
 
 class OPiece(Block):
+    __slots__ = ()
+    rotations = build_rotations((
+        ((0,0), (0,1), (1,0), (1,1)),
+        ((0,0), (0,1), (1,0), (1,1)),
+        ((0,0), (0,1), (1,0), (1,1)),
+        ((0,0), (0,1), (1,0), (1,1))
+    ))
+
     def __init__(self):
         super().__init__(id = 4)
-        self.cells = {
-            0: [Position(0,0), Position(0,1), Position(1,0), Position(1,1)],
-            1: [Position(0,0), Position(0,1), Position(1,0), Position(1,1)],
-            2: [Position(0,0), Position(0,1), Position(1,0), Position(1,1)],
-            3: [Position(0,0), Position(0,1), Position(1,0), Position(1,1)]
-        }
         self.move(0,4)
 
 class SPiece(Block):
+    __slots__ = ()
+    rotations = build_rotations((
+        ((0,1), (0,2), (1,0), (1,1)),
+        ((0,1), (1,1), (1,2), (2,2)),
+        ((1,1), (1,2), (2,0), (2,1)),
+        ((0,0), (1,0), (1,1), (2,1))
+    ))
+
     def __init__(self):
         super().__init__(id = 5)
-        self.cells = {
-            0: [Position(0,1), Position(0,2), Position(1,0), Position(1,1)],
-            1: [Position(0,1), Position(1,1), Position(1,2), Position(2,2)],
-            2: [Position(1,1), Position(1,2), Position(2,0), Position(2,1)],
-            3: [Position(0,0), Position(1,0), Position(1,1), Position(2,1)]
-        }
         self.move(0,3)
 
 class ZPiece(Block):
+    __slots__ = ()
+    rotations = build_rotations((
+        ((0,0), (0,1), (1,1), (1,2)),
+        ((0,2), (1,1), (1,2), (2,1)),
+        ((1,0), (1,1), (2,1), (2,2)),
+        ((0,1), (1,0), (1,1), (2,0))
+    ))
+
     def __init__(self):
         super().__init__(id = 6)
-        self.cells = {
-            0: [Position(0,0), Position(0,1), Position(1,1), Position(1,2)],
-            1: [Position(0,2), Position(1,1), Position(1,2), Position(2,1)],
-            2: [Position(1,0), Position(1,1), Position(2,1), Position(2,2)],
-            3: [Position(0,1), Position(1,0), Position(1,1), Position(2,0)]
-        }
         self.move(0,3)
 
 class TPiece(Block):
+    __slots__ = ()
+    rotations = build_rotations((
+        ((0,1), (1,0), (1,1), (1,2)),
+        ((0,1), (1,1), (1,2), (2,1)),
+        ((1,0), (1,1), (1,2), (2,1)),
+        ((0,1), (1,0), (1,1), (2,1))
+    ))
+
     def __init__(self):
         super().__init__(id = 7)
-        self.cells = {
-            0: [Position(0,1), Position(1,0), Position(1,1), Position(1,2)],
-            1: [Position(0,1), Position(1,1), Position(1,2), Position(2,1)],
-            2: [Position(1,0), Position(1,1), Position(1,2), Position(2,1)],
-            3: [Position(0,1), Position(1,0), Position(1,1), Position(2,1)]
-        }
         self.move(0,3)
+
+# The seven piece types in the order the bag is filled.
+PIECES = (IPiece, JPiece, LPiece, OPiece, SPiece, ZPiece, TPiece)
+
+
+def spawn_shift(num_cols):
+    """
+    Get how far pieces spawn from their standard column on a board of a given width.
+
+    Args:
+        num_cols (int): Width of the board.
+
+    Returns:
+        int: Columns to move a new piece right, negative on narrow boards.
+    """
+    return (num_cols - STANDARD_COLUMNS) // 2
+
+
+def spawn_block(piece, num_cols):
+    """
+    Create a piece at its spawn position, centred on a board of a given width.
+
+    Args:
+        piece (type): A piece class from PIECES.
+        num_cols (int): Width of the board.
+
+    Returns:
+        Block: The new piece.
+    """
+    block = piece()
+    shift = spawn_shift(num_cols)
+    if shift:
+        block.move(0, shift)
+    return block
@@ -0,0 +1,258 @@
+from collections import deque
+import multiprocessing
+from blocks import PIECES, spawn_block
+from grid import row_hash, zobrist_keys
+from placements import find_placements
+from transposition import TranspositionCache
+
+# Heuristic weights for (aggregate height, lines cleared, holes, bumpiness).
+DEFAULT_WEIGHTS = (-0.510066, 0.760666, -0.35663, -0.184483)
+PIECE_INDEX = {piece().id: index for index, piece in enumerate(PIECES)}
+# First element of every cache key, naming what the entry holds. Both kinds share one cache
+# and the rest of their keys have the same shape, so without it they could collide.
+EVALUATION = "eval"
+FOLLOW_UP = "next"
+
+
+class Board:
+    """
+    Lightweight board used during search: just the grid's row masks and dimensions.
+    Cheap to copy and to send to worker processes. Carries the same Zobrist hash a
+    Grid with these cells would have.
+    """
+    __slots__ = ("rows", "num_rows", "num_cols", "full_row", "hash")
+
+    def __init__(self, rows, num_rows, num_cols, hash=None):
+        """
+        Args:
+            rows (list[int]): One occupancy bitmask per row, top row first.
+            num_rows (int): Number of rows.
+            num_cols (int): Number of columns.
+            hash (int): Zobrist hash of rows, worked out from them when omitted.
+        """
+        self.rows = rows
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.full_row = (1 << num_cols) - 1
+        if hash is None:
+            keys = zobrist_keys(num_rows, num_cols)
+            hash = 0
+            for row, mask in enumerate(rows):
+                hash ^= row_hash(keys[row], mask)
+        self.hash = hash
+
+    def place(self, rotation, row, column):
+        """
+        Lock a piece into a copy of the board and clear any full rows.
+
+        Args:
+            rotation (Rotation): The piece's rotation.
+            row (int): Row offset of the piece.
+            column (int): Column offset of the piece.
+
+        Returns:
+            tuple[Board, int]: The resulting board and the number of rows cleared.
+        """
+        keys = zobrist_keys(self.num_rows, self.num_cols)
+        rows = self.rows[:]
+        hash = self.hash
+        for piece_row, mask in rotation.row_masks:
+            mask = mask << column if column >= 0 else mask >> -column
+            rows[row + piece_row] |= mask
+            hash ^= row_hash(keys[row + piece_row], mask)
+        kept = [mask for mask in rows if mask != self.full_row]
+        cleared = self.num_rows - len(kept)
+        if cleared:
+            kept = [0] * cleared + kept
+            for index in range(self.num_rows):
+                if rows[index] != kept[index]:
+                    hash ^= row_hash(keys[index], rows[index]) ^ row_hash(keys[index], kept[index])
+        return Board(kept, self.num_rows, self.num_cols, hash), cleared
+
+
+def evaluate(board, lines, weights=DEFAULT_WEIGHTS):
+    """
+    Score a board with a linear heuristic; higher is better.
+
+    Args:
+        board (Board): The board to score.
+        lines (int): Rows cleared on the way to this board.
+        weights (tuple[float, float, float, float]): Weights for aggregate height,
+            lines cleared, holes and bumpiness.
+
+    Returns:
+        float: The board's score.
+    """
+    heights = [0] * board.num_cols
+    covered = 0
+    holes = 0
+    for row, mask in enumerate(board.rows):
+        new = mask & ~covered
+        while new:
+            lowest = new & -new
+            heights[lowest.bit_length() - 1] = board.num_rows - row
+            new ^= lowest
+        covered |= mask
+        # Empty cells with a filled cell somewhere above them are holes.
+        holes += (covered & ~mask).bit_count()
+    bumpiness = sum(abs(heights[column] - heights[column + 1]) for column in range(board.num_cols - 1))
+    height_weight, lines_weight, holes_weight, bumpiness_weight = weights
+    return (height_weight * sum(heights) + lines_weight * lines
+            + holes_weight * holes + bumpiness_weight * bumpiness)
+
+
+def best_follow_up(task):
+    """
+    Best score reachable by placing one more piece on a board, counting only
+    the lines that piece clears. Module-level so it can run in a worker process.
+
+    Args:
+        task (tuple): (rows, num_rows, num_cols, board hash, piece index into PIECES, weights).
+
+    Returns:
+        float: The best score, or None if the piece cannot spawn or be placed.
+    """
+    rows, num_rows, num_cols, hash, piece_index, weights = task
+    board = Board(rows, num_rows, num_cols, hash)
+    piece = spawn_block(PIECES[piece_index], num_cols)
+    best = None
+    for placement in find_placements(board, piece):
+        child, cleared = board.place(piece.rotations[placement.rotation], placement.row, placement.column)
+        score = evaluate(child, cleared, weights)
+        if best is None or score > best:
+            best = score
+    return best
+
+
+class Bot:
+    """
+    Chooses where to put the current piece with a two-piece beam search.
+    Every placement of the current piece is scored, the best `beam_width` are kept and
+    each is expanded with every placement of the next piece. Wide beams are expanded
+    in a multiprocessing pool so the search uses every core.
+
+    Evaluations are kept in a TranspositionCache keyed on (EVALUATION, board hash, piece id,
+    rotation, row, column), and the best follow-up of a board on (FOLLOW_UP, board hash,
+    next piece id, spawn rotation, row, column), so positions met again in later searches
+    are not re-scored.
+    """
+    def __init__(self, weights=DEFAULT_WEIGHTS, beam_width=8, processes=None, parallel_threshold=16, cache=None):
+        """
+        Args:
+            weights (tuple[float, float, float, float]): Heuristic weights, see evaluate().
+            beam_width (int): Placements of the current piece expanded with the next piece.
+            processes (int): Worker processes, defaults to the number of cores.
+            parallel_threshold (int): Smallest beam worth sending to the pool; narrower beams
+                are expanded in this process, where they finish faster than the round trip.
+            cache (TranspositionCache): Cache of evaluations. A new one is made when omitted.
+        """
+        self.weights = weights
+        self.cache = cache if cache is not None else TranspositionCache()
+        self.beam_width = beam_width
+        self.processes = processes
+        self.parallel_threshold = parallel_threshold
+        self.pool = None
+
+    def choose(self, game):
+        """
+        Pick a placement for the game's current piece from its current state.
+
+        Args:
+            game (Game): The game to play.
+
+        Returns:
+            Placement: The chosen placement, or None if the piece cannot be placed anywhere.
+        """
+        grid = game.grid
+        board = Board(grid.rows[:], grid.num_rows, grid.num_cols, grid.board_hash())
+        block = game.current_block
+        cache = self.cache
+        candidates = []
+        for placement in find_placements(board, block):
+            child, cleared = board.place(block.rotations[placement.rotation], placement.row, placement.column)
+            key = (EVALUATION, board.hash, block.id, placement.rotation, placement.row, placement.column)
+            score = cache.get(key)
+            if score is None:
+                score = evaluate(child, cleared, self.weights)
+                cache.put(key, score)
+            candidates.append((score, placement, child, cleared))
+        if not candidates:
+            return None
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        beam = candidates[:self.beam_width]
+
+        # The next piece is searched from its spawn state.
+        next_block = game.next_block
+        next_index = PIECE_INDEX[next_block.id]
+        spawn = (next_block.id, next_block.rotation_state, next_block.row_offset, next_block.column_offset)
+        follow_ups = [cache.get((FOLLOW_UP, child.hash) + spawn, False) for score, placement, child, cleared in beam]
+        missing = [index for index, follow_up in enumerate(follow_ups) if follow_up is False]
+        tasks = [(beam[index][2].rows, board.num_rows, board.num_cols, beam[index][2].hash, next_index, self.weights)
+                 for index in missing]
+        if len(tasks) >= self.parallel_threshold:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.processes)
+            results = self.pool.map(best_follow_up, tasks)
+        else:
+            results = [best_follow_up(task) for task in tasks]
+        for index, result in zip(missing, results):
+            follow_ups[index] = result
+            cache.put((FOLLOW_UP, beam[index][2].hash) + spawn, result)
+
+        lines_weight = self.weights[1]
+        best = None
+        best_score = None
+        for (score, placement, child, cleared), follow_up in zip(beam, follow_ups):
+            # A board the next piece cannot be placed on loses the game.
+            total = follow_up + lines_weight * cleared if follow_up is not None else float("-inf")
+            if best_score is None or total > best_score:
+                best, best_score = placement, total
+        return best
+
+    def close(self):
+        """
+        Shut down the worker pool, if one was started.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+class Autoplayer:
+    """
+    Drives a Game with a Bot through Game.apply_action, the same calls a human's inputs make.
+    Plans when a new piece appears, or again if gravity moved the piece off the planned path.
+    """
+    def __init__(self, bot, moves_per_tick=4):
+        """
+        Args:
+            bot (Bot): Chooses placements.
+            moves_per_tick (int): Most actions applied per logic tick.
+        """
+        self.bot = bot
+        self.moves_per_tick = moves_per_tick
+        self.block = None
+        self.expected = None
+        self.plan = deque()
+
+    def update(self, game):
+        """
+        Apply the next few planned actions. Call once per logic tick.
+
+        Args:
+            game (Game): The game to play.
+        """
+        if game.paused or game.game_over:
+            return
+        block = game.current_block
+        state = (block.rotation_state, block.row_offset, block.column_offset)
+        if block is not self.block or state != self.expected:
+            placement = self.bot.choose(game)
+            self.block = block
+            self.plan = deque(placement.path if placement is not None else ())
+        for _ in range(self.moves_per_tick):
+            if not self.plan or game.current_block is not block:
+                break
+            game.apply_action(self.plan.popleft())
+        self.expected = (block.rotation_state, block.row_offset, block.column_offset)
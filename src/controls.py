@@ -1,105 +1,167 @@
+from collections import deque
+import time
 import pygame
+from actions import *
+
+class AutoShift:
+    """
+    Delayed auto-shift (DAS) and auto-repeat (ARR) for one held direction.
+    Fires once on press, again after the DAS delay, then every ARR interval while held.
+    Repeat times are scheduled exactly, so several repeats can fall between two polls.
+    """
+    def __init__(self, action, das, arr):
+        """
+        Initialise a released direction.
+
+        Args:
+            action (int): Action code emitted on press and on each repeat.
+            das (float): Delay in milliseconds before auto-repeat starts, 0 to repeat straight away.
+            arr (float): Milliseconds between repeats once auto-repeat has started.
+        """
+        self.action = action
+        self.das = das
+        self.arr = max(1, arr)
+        self.sources = set()
+        self.next_repeat = None
+
+    def press(self, source, now, queue):
+        """
+        Mark the direction as held by an input source. Only the first source to press it fires.
+
+        Args:
+            source (str): The device holding the direction, e.g. "key", "hat" or "axis".
+            now (float): Timestamp of the press in milliseconds.
+            queue (deque): Queue that receives (timestamp, action) pairs.
+        """
+        if not self.sources:
+            queue.append((now, self.action))
+            self.next_repeat = now + (self.das if self.das > 0 else self.arr)
+        self.sources.add(source)
+
+    def release(self, source):
+        """
+        Mark an input source as no longer holding the direction.
+
+        Args:
+            source (str): The device releasing the direction.
+        """
+        self.sources.discard(source)
+        if not self.sources:
+            self.next_repeat = None
+
+    def repeat(self, now, queue):
+        """
+        Emit every auto-repeat that is due up to now.
+
+        Args:
+            now (float): Current time in milliseconds.
+            queue (deque): Queue that receives (timestamp, action) pairs.
+        """
+        while self.next_repeat is not None and self.next_repeat <= now:
+            queue.append((self.next_repeat, self.action))
+            self.next_repeat += self.arr
+
 
 class Controls:
     """
-    Handles input for Drop Block. Only detects player intent and returns actions.
+    Handles input for Drop Block. Only detects player intent and queues actions.
+
+    Keyboard, D-pad and stick are merged per direction, so holding the same direction
+    on two devices moves the block once. Each action is queued with its timestamp in
+    milliseconds; the game loop pops them from `queue` on each logic tick.
     """
 
-    def __init__(self):
+    def __init__(self, das=150, arr=50, soft_drop_arr=50):
+        """
+        Initialise joysticks, the action queue and the auto-repeat state of each direction.
+
+        Args:
+            das (float): Milliseconds a left/right direction is held before it auto-repeats.
+            arr (float): Milliseconds between left/right repeats.
+            soft_drop_arr (float): Milliseconds between soft drop repeats (no initial delay).
+        """
         pygame.joystick.init()
         self.joysticks = [pygame.joystick.Joystick(x) for x in range(pygame.joystick.get_count())]
-        self.axis_x = 0
-        self.hat_x = 0
-        self.hat_y = 0
+        self.queue = deque()
+        self.left = AutoShift(MOVE_LEFT, das, arr)
+        self.right = AutoShift(MOVE_RIGHT, das, arr)
+        self.down = AutoShift(MOVE_DOWN, 0, soft_drop_arr)
+        self.keys = {pygame.K_LEFT: self.left, pygame.K_RIGHT: self.right, pygame.K_DOWN: self.down}
 
-        # Continuous move tracking
-        self.MOVE_DELAY = 120
-        self.last_move_time = {"left": 0, "right": 0, "down": 0}
+    def set_held(self, shift, source, held, now):
+        """
+        Press or release a direction for one input source.
+
+        Args:
+            shift (AutoShift): The direction to update.
+            source (str): The device reporting the change.
+            held (bool): Whether the device now holds the direction.
+            now (float): Timestamp of the change in milliseconds.
+        """
+        if held:
+            shift.press(source, now, self.queue)
+        else:
+            shift.release(source)
 
-    def get_actions(self, events):
+    def update(self, events, now=None):
         """
-        Process all events and returns a dict of actions for this frame.
+        Process all events and queue the resulting actions, including auto-repeats now due.
 
-        Returns:
-            dict: action booleans, e.g., {"move_left": True, "rotate": False, ...}
+        Args:
+            events (list[pygame.event.Event]): Events pumped since the last call.
+            now (float): Current time in milliseconds. Defaults to time.perf_counter().
         """
-        current_time = pygame.time.get_ticks()
-        actions = {
-            "move_left": False,
-            "move_right": False,
-            "move_down": False,
-            "rotate": False,
-            "pause_toggle": False,
-            "reset": False,
-            "quit": False,
-        }
+        if now is None:
+            now = time.perf_counter() * 1000
+        queue = self.queue
+
+        # --- Continuous input handling ---
+        # Repeats that fell due since the last call come before this call's presses.
+        self.left.repeat(now, queue)
+        self.right.repeat(now, queue)
+        self.down.repeat(now, queue)
 
         # --- Process events ---
         for event in events:
             if event.type == pygame.QUIT:
-                actions["quit"] = True
+                queue.append((now, QUIT))
 
             # --- Keyboard ---
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    actions["pause_toggle"] = True
+            elif event.type == pygame.KEYDOWN:
+                if event.key in self.keys:
+                    self.keys[event.key].press("key", now, queue)
+                elif event.key == pygame.K_SPACE:
+                    queue.append((now, PAUSE_TOGGLE))
                 elif event.key == pygame.K_r:
-                    actions["reset"] = True
+                    queue.append((now, RESET))
                 elif event.key == pygame.K_UP:
-                    actions["rotate"] = True
+                    queue.append((now, ROTATE))
+                elif event.key == pygame.K_F3:
+                    queue.append((now, TOGGLE_PROFILER))
+                elif event.key == pygame.K_F11:
+                    queue.append((now, TOGGLE_FULLSCREEN))
+            elif event.type == pygame.KEYUP:
+                if event.key in self.keys:
+                    self.keys[event.key].release("key")
 
             # --- Joystick buttons ---
-            if event.type == pygame.JOYBUTTONDOWN:
+            elif event.type == pygame.JOYBUTTONDOWN:
                 if event.button in [0, 1, 3]:  # A/B/X = rotate
-                    actions["rotate"] = True
+                    queue.append((now, ROTATE))
                 elif event.button == 7:  # + = pause
-                    actions["pause_toggle"] = True
+                    queue.append((now, PAUSE_TOGGLE))
                 elif event.button == 6:  # - = reset
-                    actions["reset"] = True
+                    queue.append((now, RESET))
 
             # --- Hat (D-pad) ---
-            if event.type == pygame.JOYHATMOTION:
-                self.hat_x, self.hat_y = event.value
+            elif event.type == pygame.JOYHATMOTION:
+                hat_x, hat_y = event.value
+                self.set_held(self.left, "hat", hat_x == -1, now)
+                self.set_held(self.right, "hat", hat_x == 1, now)
+                self.set_held(self.down, "hat", hat_y == -1, now)
 
             # --- Joystick axis ---
-            if event.type == pygame.JOYAXISMOTION:
+            elif event.type == pygame.JOYAXISMOTION:
                 if event.axis == 0:
-                    self.axis_x = event.value if abs(event.value) > 0.5 else 0
-
-        # --- Continuous input handling ---
-        keys = pygame.key.get_pressed()
-
-        def can_move(direction):
-            return current_time - self.last_move_time[direction] > self.MOVE_DELAY
-
-        # Keyboard
-        if keys[pygame.K_LEFT] and can_move("left"):
-            actions["move_left"] = True
-            self.last_move_time["left"] = current_time
-        if keys[pygame.K_RIGHT] and can_move("right"):
-            actions["move_right"] = True
-            self.last_move_time["right"] = current_time
-        if keys[pygame.K_DOWN] and can_move("down"):
-            actions["move_down"] = True
-            self.last_move_time["down"] = current_time
-
-        # Hat
-        if self.hat_x == -1 and can_move("left"):
-            actions["move_left"] = True
-            self.last_move_time["left"] = current_time
-        elif self.hat_x == 1 and can_move("right"):
-            actions["move_right"] = True
-            self.last_move_time["right"] = current_time
-        if self.hat_y == -1 and can_move("down"):
-            actions["move_down"] = True
-            self.last_move_time["down"] = current_time
-
-        # Joystick
-        if self.axis_x < -0.5 and can_move("left"):
-            actions["move_left"] = True
-            self.last_move_time["left"] = current_time
-        elif self.axis_x > 0.5 and can_move("right"):
-            actions["move_right"] = True
-            self.last_move_time["right"] = current_time
-
-        return actions
+                    self.set_held(self.left, "axis", event.value < -0.5, now)
+                    self.set_held(self.right, "axis", event.value > 0.5, now)
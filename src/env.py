@@ -0,0 +1,335 @@
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from blocks import PIECES
+from game import Game, check_seed
+from grid import Grid
+from timing import FixedTimestep
+
+# Default board size, as Grid's.
+NUM_ROWS = 20
+NUM_COLS = 10
+# Actions an agent can take: nothing, or the Game action code with the same value.
+NUM_ACTIONS = 5
+# Each observation is the board's colour plane followed by PIECE_FIELDS int16s:
+# current piece (index into PIECES), its rotation, row offset and column offset, and the next piece.
+PIECE_FIELDS = 5
+
+
+def observation_bytes(num_rows=NUM_ROWS, num_cols=NUM_COLS):
+    """
+    Args:
+        num_rows (int): Rows of the board.
+        num_cols (int): Columns of the board.
+
+    Returns:
+        int: Bytes one observation takes: the board's cells, then the piece fields.
+    """
+    return num_rows * num_cols + PIECE_FIELDS * 2
+
+
+OBSERVATION_BYTES = observation_bytes()
+
+
+class DropBlockEnv:
+    """
+    Reinforcement-learning environment around a Game, with a gym-style
+    reset()/step() interface.
+
+    The observation is a dict of two NumPy arrays that are views, not copies:
+    "board" is a (rows, columns) uint8 view straight onto the grid's colour plane and
+    "piece" holds PIECE_FIELDS int16s describing the falling and next piece. Both live
+    in one buffer, which may be supplied (e.g. a slice of shared memory); they are updated
+    in place by every step, so copy them to keep an old observation.
+
+    An action is 0 for nothing, or MOVE_LEFT, MOVE_RIGHT, MOVE_DOWN or ROTATE from
+    actions.py. Each step applies the action and then advances gravity by
+    `ticks_per_step` logic ticks. The reward is the score gained during the step.
+    """
+    def __init__(self, seed=None, ticks_per_step=4, tick_rate=240, buffer=None, num_rows=NUM_ROWS, num_cols=NUM_COLS):
+        """
+        Args:
+            seed (int): Seed for the first game's pieces, random when omitted.
+            ticks_per_step (int): Logic ticks of gravity after each action.
+            tick_rate (int): Logic ticks per second, which sets the length of a tick.
+            buffer: Optional writable buffer of observation_bytes(num_rows, num_cols) zeroed
+                bytes to hold the observation.
+            num_rows (int): Rows of the board.
+            num_cols (int): Columns of the board.
+        """
+        if buffer is None:
+            buffer = bytearray(observation_bytes(num_rows, num_cols))
+        buffer = memoryview(buffer)
+        board_bytes = num_rows * num_cols
+        self.game = Game(seed=seed, grid=Grid(num_rows, num_cols, buffer[:board_bytes]))
+        self.ticks_per_step = ticks_per_step
+        self.tick_ms = FixedTimestep(tick_rate).tick_ms
+        board = np.frombuffer(buffer, dtype=np.uint8, count=board_bytes).reshape(num_rows, num_cols)
+        board.flags.writeable = False
+        self.piece = np.frombuffer(buffer, dtype=np.int16, count=PIECE_FIELDS, offset=board_bytes)
+        piece = self.piece.view()
+        piece.flags.writeable = False
+        self.observation = {"board": board, "piece": piece}
+        self.update_piece()
+
+    def update_piece(self):
+        """
+        Write the falling and next piece into the observation.
+        """
+        block = self.game.current_block
+        self.piece[:] = (PIECES.index(type(block)), block.rotation_state, block.row_offset,
+                         block.column_offset, PIECES.index(type(self.game.next_block)))
+
+    def info(self):
+        """
+        Returns:
+            dict: The game's score, level and lines cleared.
+        """
+        return {"score": self.game.score, "level": self.game.level, "lines": self.game.total_lines_cleared}
+
+    def reset(self, seed=None):
+        """
+        Start a new game.
+
+        Args:
+            seed (int): Seed for the new game's pieces, 0 <= seed < 2**64. The game's generator
+                carries on when omitted.
+
+        Returns:
+            tuple[dict, dict]: The observation and info.
+        """
+        if seed is not None:
+            check_seed(seed)
+            self.game.seed = seed
+            self.game.random.seed(seed)
+            self.game.saved_random_state = None
+        self.game.reset()
+        self.update_piece()
+        return self.observation, self.info()
+
+    def step(self, action):
+        """
+        Apply an action, then advance gravity.
+
+        Args:
+            action (int): 0 for nothing, otherwise MOVE_LEFT, MOVE_RIGHT, MOVE_DOWN or ROTATE.
+
+        Returns:
+            tuple[dict, int, bool, bool, dict]: Observation, reward, whether the game is over,
+                whether it was cut short (always False) and info.
+
+        Raises:
+            ValueError: If the action is not in range(NUM_ACTIONS), e.g. Game's PAUSE_TOGGLE or RESET.
+        """
+        if not 0 <= action < NUM_ACTIONS:
+            raise ValueError(f"action must be in range({NUM_ACTIONS}), got {action}")
+        game = self.game
+        score = game.score
+        if action:
+            game.apply_action(action)
+        for _ in range(self.ticks_per_step):
+            game.tick(self.tick_ms)
+        self.update_piece()
+        return self.observation, game.score - score, game.game_over, False, self.info()
+
+
+def shared_arrays(buffer, num_envs, num_rows=NUM_ROWS, num_cols=NUM_COLS):
+    """
+    Lay out the shared block used by VectorEnv: every environment's observation,
+    one after another, then the rewards, actions and game-over flags.
+
+    Args:
+        buffer: The shared memory's buffer.
+        num_envs (int): Number of environments.
+        num_rows (int): Rows of each board.
+        num_cols (int): Columns of each board.
+
+    Returns:
+        dict: NumPy views onto the buffer: "board" (num_envs, rows, columns) uint8,
+            "piece" (num_envs, PIECE_FIELDS) int16, "action" int8, "reward" int64
+            and "terminated" bool, one entry per environment.
+    """
+    size = observation_bytes(num_rows, num_cols)
+    start = num_envs * size
+    start += -start % 8
+    return {
+        "board": np.ndarray((num_envs, num_rows, num_cols), np.uint8, buffer,
+                            strides=(size, num_cols, 1)),
+        "piece": np.ndarray((num_envs, PIECE_FIELDS), np.int16, buffer, offset=num_rows * num_cols,
+                            strides=(size, 2)),
+        "reward": np.ndarray(num_envs, np.int64, buffer, offset=start),
+        "action": np.ndarray(num_envs, np.int8, buffer, offset=start + 8 * num_envs),
+        "terminated": np.ndarray(num_envs, np.bool_, buffer, offset=start + 9 * num_envs),
+    }
+
+
+def shared_size(num_envs, num_rows=NUM_ROWS, num_cols=NUM_COLS):
+    """
+    Returns:
+        int: Bytes of shared memory VectorEnv needs for num_envs environments of num_rows x num_cols boards.
+    """
+    start = num_envs * observation_bytes(num_rows, num_cols)
+    return start + -start % 8 + 10 * num_envs
+
+
+def serve(buffer, num_envs, first, seeds, ticks_per_step, tick_rate, num_rows, num_cols, connection):
+    """
+    Run some of a VectorEnv's environments until told to close.
+
+    Each environment keeps its observation in the shared block; actions are read from
+    it and rewards and game-over flags written back. The pipe only carries commands:
+    "step", "reset" or "close", each but the last answered with None once done.
+
+    Args:
+        buffer: The shared memory's buffer.
+        num_envs (int): Environments in the whole VectorEnv.
+        first (int): Index of the first environment run here.
+        seeds (list[int]): Seed of each environment run here.
+        ticks_per_step (int): See DropBlockEnv.
+        tick_rate (int): See DropBlockEnv.
+        num_rows (int): See DropBlockEnv.
+        num_cols (int): See DropBlockEnv.
+        connection (Connection): This worker's end of the command pipe.
+    """
+    arrays = shared_arrays(buffer, num_envs, num_rows, num_cols)
+    size = observation_bytes(num_rows, num_cols)
+    envs = [DropBlockEnv(seed, ticks_per_step, tick_rate, buffer[index * size:(index + 1) * size], num_rows, num_cols)
+            for index, seed in enumerate(seeds, first)]
+    indices = range(first, first + len(envs))
+    while True:
+        command = connection.recv()
+        if command == "step":
+            for index, env in zip(indices, envs):
+                observation, reward, terminated, truncated, info = env.step(int(arrays["action"][index]))
+                arrays["reward"][index] = reward
+                arrays["terminated"][index] = terminated
+                if terminated:
+                    env.reset()
+        elif command == "reset":
+            for env in envs:
+                env.reset()
+        elif command == "close":
+            return
+        connection.send(None)
+
+
+def run_worker(name, *args):
+    """
+    Entry point of a VectorEnv worker process. Module-level so it can be started with
+    any multiprocessing start method.
+
+    Args:
+        name (str): Name of the shared memory block.
+        *args: The rest of serve()'s arguments.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    # serve() has returned, and its views onto the block with it, before the block is closed.
+    serve(memory.buf, *args)
+    memory.close()
+    args[-1].send(None)
+
+
+class VectorEnv:
+    """
+    Runs many DropBlockEnvs in worker processes and steps them all with one call.
+
+    Observations, actions, rewards and game-over flags sit in one
+    multiprocessing.shared_memory block: workers write each board straight into it and
+    step() returns NumPy views onto it, so nothing is pickled or copied per step.
+    Environments whose game ends are reset straight away; the step that ended a game
+    reports terminated and the observation is already of the new game.
+    """
+    def __init__(self, num_envs, seeds=None, processes=None, ticks_per_step=4, tick_rate=240,
+                 num_rows=NUM_ROWS, num_cols=NUM_COLS):
+        """
+        Args:
+            num_envs (int): Number of environments.
+            seeds (list[int]): Seed of each environment, 0 to num_envs - 1 by default.
+            processes (int): Worker processes, defaults to the number of cores.
+            ticks_per_step (int): See DropBlockEnv.
+            tick_rate (int): See DropBlockEnv.
+            num_rows (int): See DropBlockEnv.
+            num_cols (int): See DropBlockEnv.
+        """
+        seeds = list(seeds) if seeds is not None else list(range(num_envs))
+        processes = min(processes or multiprocessing.cpu_count(), num_envs)
+        self.num_envs = num_envs
+        self.memory = shared_memory.SharedMemory(create=True, size=shared_size(num_envs, num_rows, num_cols))
+        self.arrays = shared_arrays(self.memory.buf, num_envs, num_rows, num_cols)
+        self.observation = {"board": self.arrays["board"], "piece": self.arrays["piece"]}
+        self.connections = []
+        self.workers = []
+        for worker in range(processes):
+            first = worker * num_envs // processes
+            last = (worker + 1) * num_envs // processes
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=run_worker, daemon=True,
+                args=(self.memory.name, num_envs, first, seeds[first:last], ticks_per_step, tick_rate,
+                      num_rows, num_cols, child))
+            process.start()
+            self.connections.append(parent)
+            self.workers.append(process)
+
+    def send(self, command):
+        """
+        Send a command to every worker and wait until all have finished it.
+        """
+        for connection in self.connections:
+            connection.send(command)
+        for connection in self.connections:
+            connection.recv()
+
+    def reset(self):
+        """
+        Start a new game in every environment.
+
+        Returns:
+            dict: The observations, as in step().
+        """
+        self.send("reset")
+        return self.observation
+
+    def step(self, actions):
+        """
+        Apply one action to every environment, then advance their gravity.
+
+        Args:
+            actions (np.ndarray): One action per environment, as for DropBlockEnv.step.
+
+        Returns:
+            tuple[dict, np.ndarray, np.ndarray]: Observations ("board" and "piece" arrays with
+                one entry per environment), rewards and game-over flags. All are views onto
+                shared memory that the next call overwrites.
+
+        Raises:
+            ValueError: If any action is not in range(NUM_ACTIONS). Checked here, before the
+                workers see them, so a bad action cannot stop a worker mid-step.
+        """
+        actions = np.asarray(actions)
+        if ((actions < 0) | (actions >= NUM_ACTIONS)).any():
+            raise ValueError(f"actions must be in range({NUM_ACTIONS})")
+        self.arrays["action"][:] = actions
+        self.send("step")
+        return self.observation, self.arrays["reward"], self.arrays["terminated"]
+
+    def close(self):
+        """
+        Stop the workers and free the shared memory. Arrays returned by step() and reset()
+        must not be used afterwards.
+        """
+        if self.memory is None:
+            return
+        self.send("close")
+        for process in self.workers:
+            process.join()
+        self.observation = self.arrays = None
+        self.memory.close()
+        self.memory.unlink()
+        self.memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,32 +1,68 @@
 from grid import Grid
 from blocks import *
+import actions
 import random
-import pygame
-from utils import resource_path
+import struct
+from sounds import NullSounds
+
+# Layout of Game.pack_state(): seed, ticks, score, level, lines cleared, gravity timer,
+# paused and game over; then (piece, rotation, row, column) for the current and next
+# block; then the bag, the grid's cells and the piece generator's state.
+STATE_HEADER = struct.Struct("<QQQIIdBB")
+PIECE_STATE = struct.Struct("<BBhh")
+RANDOM_STATE = struct.Struct("<B625IBd")
+# Seeds are stored as uint64 in saved states and as varints in replays.
+MAX_SEED = 2**64
+
+
+def check_seed(seed):
+    """
+    Raise ValueError unless a seed fits in a saved state, 0 <= seed < 2**64.
+
+    Args:
+        seed (int): The seed.
+    """
+    if not 0 <= seed < MAX_SEED:
+        raise ValueError(f"seed must be in range(0, 2**64), got {seed}")
+
 
 class Game:
     """"
     Main game controller for Drop Block.
     Manages the grid, falling blocks, scoring, levels, sounds, and game state.
-    Handles block movement, rotation, collision detection, and rendering.
+    Handles block movement, rotation and collision detection.
+    Has no pygame dependency; sound and rendering are supplied by adapters.
     """
 
-    def __init__(self):
+    def __init__(self, sounds=None, seed=None, grid=None):
         """
         Initialise the game with a new grid, blocks, sounds, and state variables.
         Sets up the current and next blocks, score, level, and line tracking.
+
+        Args:
+            sounds: Sound backend with a play(name) method. Defaults to NullSounds.
+            seed (int): Seed for the game's own piece generator, 0 <= seed < 2**64. A random seed
+                is chosen when omitted; either way it is kept in `seed` so the game can be replayed.
+            grid (Grid): Empty board to play on, e.g. one backed by shared memory. Defaults to a new Grid.
         """
-        self.grid = Grid()
-        self.blocks = [IPiece(), JPiece(), LPiece(), OPiece(), SPiece(), ZPiece(), TPiece()]
+        if seed is not None:
+            check_seed(seed)
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2**32)
+        self.random = random.Random(self.seed)
+        self.saved_random_state = None
+        self.ticks = 0
+        self.recorder = None
+        self.grid = grid if grid is not None else Grid()
+        self.blocks = list(PIECES)
         self.current_block = self.get_random_block()
         self.next_block = self.get_random_block()
         self.game_over = False
         self.score = 0
-        self.place_block_sound = pygame.mixer.Sound(resource_path("sounds/thump.mp3"))
-        self.clear_line_sound = pygame.mixer.Sound(resource_path("sounds/clear.mp3"))
+        self.sounds = sounds if sounds is not None else NullSounds()
         self.level = 0
         self.total_lines_cleared = 0
         self.paused = False
+        self.gravity_timer = 0
 
     def update_score(self, lines_cleared):
         """
@@ -55,6 +91,24 @@ class Game:
         SPEED_INCREMENT = 25
         return max(MAXIMUM_SPEED, BASE_SPEED - (SPEED_INCREMENT * self.level))
 
+    def tick(self, milliseconds):
+        """
+        Advance the gravity timer by one logic tick and drop the current block
+        each time a full drop interval has elapsed. Does nothing while paused or over.
+
+        Args:
+            milliseconds (float): Length of the tick in milliseconds.
+        """
+        self.ticks += 1
+        if self.paused or self.game_over:
+            return
+        self.gravity_timer += milliseconds
+        drop_speed = self.get_drop_speed()
+        while self.gravity_timer >= drop_speed and not self.game_over:
+            self.gravity_timer -= drop_speed
+            self.move_down()
+            drop_speed = self.get_drop_speed()
+
     def increase_total_lines_cleared(self, lines_cleared):
         """
         Add the number of rows cleared to the total count.
@@ -77,16 +131,45 @@ class Game:
         """
         Select a random block from the available pieces and remove it from the pool.
         Replenishes the pool when only four pieces remain.
+        The pool holds piece classes; only the chosen piece is instantiated.
         
         Returns:
             Block: The randomly selected Tetris block.
         """
         if len(self.blocks) == 4:
-            self.blocks = [IPiece(), JPiece(), LPiece(), OPiece(), SPiece(), ZPiece(), TPiece()]
-        block = random.choice(self.blocks)
-        self.blocks.remove(block)
-        return block
+            self.blocks = list(PIECES)
+        piece = self.random.choice(self.blocks)
+        self.saved_random_state = None
+        self.blocks.remove(piece)
+        return spawn_block(piece, self.grid.num_cols)
     
+    def apply_action(self, action):
+        """
+        Apply a player action. Movement is ignored while paused or after game over.
+        The action is passed to the recorder, if one is attached.
+
+        Args:
+            action (int): An action code from actions.py.
+        """
+        if self.recorder is not None:
+            self.recorder.record(self.ticks, action)
+        match action:
+            case actions.PAUSE_TOGGLE:
+                self.paused = not self.paused
+            case actions.RESET:
+                self.reset()
+        if self.paused or self.game_over:
+            return
+        match action:
+            case actions.MOVE_LEFT:
+                self.move_left()
+            case actions.MOVE_RIGHT:
+                self.move_right()
+            case actions.MOVE_DOWN:
+                self.move_down()
+            case actions.ROTATE:
+                self.rotate()
+
     def move_left(self):
         """
         Move the current block one column to the left.
@@ -115,21 +198,41 @@ class Game:
             self.current_block.move(-1, 0)
             self.lock_block()
 
+    def drop_distance(self):
+        """
+        Get how many rows the current block can fall before it lands.
+        Useful for a ghost piece or hard drop.
+
+        Returns:
+            int: Number of rows the block can move down.
+        """
+        block = self.current_block
+        return self.grid.drop_distance(block.row_offset, block.column_offset, block.get_rotation())
+
+    def hard_drop(self):
+        """
+        Drop the current block straight down and lock it.
+        """
+        self.current_block.move(self.drop_distance(), 0)
+        self.lock_block()
+
     def lock_block(self):
         """
         Lock the current block into the grid when it can no longer move down.
         Clears full rows, updates score and level, and spawns the next block.
         Ends the game if a new block cannot be placed.
         """
-        tiles = self.current_block.get_cell_position()
-        for position in tiles:
-            self.grid.grid[position.row][position.column] = self.current_block.id
-        self.place_block_sound.play()
+        block = self.current_block
+        rotation = block.get_rotation()
+        for row, column in rotation.cells:
+            self.grid.set_cell(row + block.row_offset, column + block.column_offset, block.id)
+        self.sounds.play("place")
         self.current_block = self.next_block
         self.next_block = self.get_random_block()
-        rows_cleared = self.grid.clear_full_rows()
+        rows_cleared = self.grid.clear_full_rows(
+            [row + block.row_offset for row, mask in rotation.row_masks])
         if rows_cleared > 0:
-            self.clear_line_sound.play()
+            self.sounds.play("clear")
             self.update_score(rows_cleared)
             self.increase_total_lines_cleared(rows_cleared)
             self.increase_level()
@@ -152,11 +255,12 @@ class Game:
         Returns:
             bool: True if block is inside the grid, else False
         """
-        tiles = self.current_block.get_cell_position()
-        for tile in tiles:
-            if self.grid.is_inside(tile.row, tile.column) == False:
-                return False
-        return True
+        block = self.current_block
+        rotation = block.get_rotation()
+        return (block.row_offset + rotation.min_row >= 0
+                and block.row_offset + rotation.max_row < self.grid.num_rows
+                and block.column_offset + rotation.min_column >= 0
+                and block.column_offset + rotation.max_column < self.grid.num_cols)
     
     def block_fits(self):
         """
@@ -165,12 +269,149 @@ class Game:
         Returns:
             bool: True if block does not overlap other blocks, else False
         """
-        tiles = self.current_block.get_cell_position()
-        for tile in tiles:
-            if self.grid.is_empty(tile.row, tile.column) == False:
-                return False
-        return True
+        block = self.current_block
+        return not self.grid.collides(block.row_offset, block.column_offset, block.get_rotation().row_masks)
     
+    def random_state(self):
+        """
+        Get the piece generator's state. It only changes when a piece is drawn, so the
+        state is kept until then and repeated snapshots and clones share one copy.
+
+        Returns:
+            tuple: The generator's getstate().
+        """
+        if self.saved_random_state is None:
+            self.saved_random_state = self.random.getstate()
+        return self.saved_random_state
+
+    def snapshot(self):
+        """
+        Capture the game's state cheaply, e.g. before trying a move in a search or to
+        undo the last piece. Only the board, the pieces' positions and a few numbers
+        are copied; the piece shapes are shared tables.
+
+        Returns:
+            tuple: An opaque value for restore().
+        """
+        current = self.current_block
+        return (self.grid.snapshot(), tuple(self.blocks),
+                (type(current), current.rotation_state, current.row_offset, current.column_offset),
+                type(self.next_block), self.score, self.level, self.total_lines_cleared,
+                self.gravity_timer, self.paused, self.game_over, self.ticks, self.random_state())
+
+    def restore(self, snapshot):
+        """
+        Return to a state captured by snapshot(). The current piece is a new object,
+        so anything tracking it by identity sees a fresh piece.
+
+        Args:
+            snapshot (tuple): A value returned by snapshot() on this game.
+        """
+        (grid, blocks, (piece, rotation_state, row_offset, column_offset), next_piece, self.score, self.level,
+         self.total_lines_cleared, self.gravity_timer, self.paused, self.game_over, self.ticks, random_state) = snapshot
+        self.grid.restore(grid)
+        self.blocks = list(blocks)
+        self.current_block = spawn_block(piece, self.grid.num_cols)
+        self.current_block.rotation_state = rotation_state
+        self.current_block.row_offset = row_offset
+        self.current_block.column_offset = column_offset
+        self.next_block = spawn_block(next_piece, self.grid.num_cols)
+        self.random.setstate(random_state)
+        self.saved_random_state = random_state
+
+    def clone(self, sounds=None):
+        """
+        Make an independent copy of the game for searching ahead. Nothing is recorded
+        from the copy and it plays no sounds unless given a backend.
+
+        Args:
+            sounds: Sound backend for the copy. Defaults to NullSounds.
+
+        Returns:
+            Game: The copy.
+        """
+        game = Game.__new__(Game)
+        game.seed = self.seed
+        # Skip Random's constructor, which seeds itself from the OS only to be overwritten.
+        game.random = random.Random.__new__(random.Random)
+        game.random.setstate(self.random_state())
+        game.saved_random_state = self.saved_random_state
+        game.ticks = self.ticks
+        game.recorder = None
+        game.grid = self.grid.copy()
+        game.blocks = self.blocks[:]
+        game.current_block = self.current_block.copy()
+        game.next_block = self.next_block.copy()
+        game.game_over = self.game_over
+        game.score = self.score
+        game.sounds = sounds if sounds is not None else NullSounds()
+        game.level = self.level
+        game.total_lines_cleared = self.total_lines_cleared
+        game.paused = self.paused
+        game.gravity_timer = self.gravity_timer
+        return game
+
+    def pack_state(self):
+        """
+        Serialise everything needed to carry on the game exactly: the board (two cells
+        per byte), the bag, the current and next block, score, level, lines, the gravity
+        timer and the state of the piece generator. Sounds and the recorder are not saved.
+
+        Returns:
+            bytes: The packed state, readable by load_state.
+        """
+        data = bytearray(STATE_HEADER.pack(
+            self.seed, self.ticks, self.score, self.level, self.total_lines_cleared,
+            self.gravity_timer, self.paused, self.game_over))
+        for block in (self.current_block, self.next_block):
+            data += PIECE_STATE.pack(PIECES.index(type(block)), block.rotation_state,
+                                     block.row_offset, block.column_offset)
+        data.append(len(self.blocks))
+        data += bytes(PIECES.index(piece) for piece in self.blocks)
+        cells = self.grid.cells
+        data += bytes((cells[index] << 4) | (cells[index + 1] if index + 1 < len(cells) else 0)
+                      for index in range(0, len(cells), 2))
+        version, internal_state, gauss_next = self.random_state()
+        data += RANDOM_STATE.pack(version, *internal_state, gauss_next is not None, gauss_next or 0.0)
+        return bytes(data)
+
+    def load_state(self, data):
+        """
+        Restore a state written by pack_state, replacing this game's board, pieces and counters.
+        The grid must be the same size as the one that was saved.
+
+        Args:
+            data (bytes): A packed state.
+        """
+        (self.seed, self.ticks, self.score, self.level, self.total_lines_cleared,
+         self.gravity_timer, paused, game_over) = STATE_HEADER.unpack_from(data, 0)
+        self.paused = bool(paused)
+        self.game_over = bool(game_over)
+        position = STATE_HEADER.size
+        blocks = []
+        for _ in range(2):
+            piece, rotation_state, row_offset, column_offset = PIECE_STATE.unpack_from(data, position)
+            position += PIECE_STATE.size
+            block = PIECES[piece]()
+            block.rotation_state = rotation_state
+            block.row_offset = row_offset
+            block.column_offset = column_offset
+            blocks.append(block)
+        self.current_block, self.next_block = blocks
+        count = data[position]
+        self.blocks = [PIECES[index] for index in data[position + 1:position + 1 + count]]
+        position += 1 + count
+        num_cells = len(self.grid.cells)
+        packed = data[position:position + (num_cells + 1) // 2]
+        position += len(packed)
+        cells = bytearray(len(packed) * 2)
+        cells[0::2] = bytes(byte >> 4 for byte in packed)
+        cells[1::2] = bytes(byte & 0x0F for byte in packed)
+        self.grid.load_cells(cells[:num_cells])
+        values = RANDOM_STATE.unpack_from(data, position)
+        self.random.setstate((values[0], values[1:626], values[627] if values[626] else None))
+        self.saved_random_state = None
+
     def reset(self):
         """
         Reset the game state to the beginning.
@@ -180,25 +421,9 @@ class Game:
         self.level = 0
         self.total_lines_cleared = 0
         self.grid.reset()
-        self.blocks = [IPiece(), JPiece(), LPiece(), OPiece(), SPiece(), ZPiece(), TPiece()]
+        self.blocks = list(PIECES)
         self.current_block = self.get_random_block()
         self.next_block = self.get_random_block()
         self.paused = False
         self.game_over = False
-
-
-    def draw(self, screen):
-        """
-        Render the game state to the screen, including the grid, current bock, and next block.
-        
-        Args:
-            screen (pygame.Surface): The surface to draw on.
-        """
-        self.grid.draw(screen)
-        self.current_block.draw(screen, 11, 11)
-        if self.next_block.id == 3:
-            self.next_block.draw(screen, 255, 490)
-        elif self.next_block.id == 4:
-            self.next_block.draw(screen, 255, 480)
-        else:
-            self.next_block.draw(screen, 270, 470)
+        self.gravity_timer = 0
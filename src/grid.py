@@ -1,21 +1,96 @@
-import pygame
-from colours import Colours
+import random
+
+# Fixed so the same board hashes the same in every process and every run.
+ZOBRIST_SEED = 0x5EED
+ZOBRIST_TABLES = {}
+
+
+def zobrist_keys(num_rows, num_cols):
+    """
+    Get the random 64-bit key of every cell, shared by all boards of the same size.
+
+    Args:
+        num_rows (int): Number of rows.
+        num_cols (int): Number of columns.
+
+    Returns:
+        tuple[tuple[int]]: keys[row][column].
+    """
+    keys = ZOBRIST_TABLES.get((num_rows, num_cols))
+    if keys is None:
+        generator = random.Random(ZOBRIST_SEED)
+        keys = tuple(tuple(generator.getrandbits(64) for column in range(num_cols)) for row in range(num_rows))
+        ZOBRIST_TABLES[(num_rows, num_cols)] = keys
+    return keys
+
+
+def row_hash(row_keys, mask):
+    """
+    XOR together the Zobrist keys of the occupied cells in one row.
+
+    Args:
+        row_keys (tuple[int]): The row's keys from zobrist_keys.
+        mask (int): The row's occupancy bitmask.
+
+    Returns:
+        int: The row's contribution to the board hash.
+    """
+    value = 0
+    while mask:
+        lowest = mask & -mask
+        value ^= row_keys[lowest.bit_length() - 1]
+        mask ^= lowest
+    return value
+
 
 class Grid:
     """
     Represents the game board for Drop Block.
-    Manages the grid state, cell values, collision detection, row clearing, and row rendering.
+    Manages the grid state, cell values, collision detection and row clearing.
+
+    The board is stored twice: `rows` holds one integer bitmask per row (bit c set
+    when column c is occupied) for collision and line-clear tests, and `cells` is a
+    compact colour plane of block IDs, one byte per cell, used for rendering.
+    `grid[row][column]` is a read-only per-row view onto `cells` for reading cell values;
+    cells are written through set_cell, which keeps the row masks, counts and hash in step.
+
+    `row_counts` (filled cells per row) and `column_heights` (rows from the floor to
+    the highest filled cell, 0 for an empty column) are kept up to date as cells are
+    written and rows cleared, so lock, clear and drop checks never scan the board.
+
+    board_hash() is a Zobrist hash of which cells are occupied (colours are ignored).
+    It is kept in `hash` and updated as cells are written. Clearing rows moves every
+    row above them, which on a large board would mean rehashing most of it, so a clear
+    only sets `hash` to None and the hash is rebuilt the next time it is asked for.
     """
-    def __init__(self):
+    def __init__(self, num_rows=20, num_cols=10, cells=None):
         """
         Initialise the grid with specified dimensions and empty cells.
-        Sets up colour mapping for different block IDs.
+
+        Args:
+            num_rows (int): Number of rows, at least 4.
+            num_cols (int): Number of columns, at least 4 so every piece fits.
+            cells: Optional writable buffer of num_rows * num_cols zeroed bytes to hold the
+                colour plane, e.g. a slice of shared memory that other processes read.
+                A new bytearray is used when omitted.
         """
-        self.num_rows = 20
-        self.num_cols = 10
-        self.cell_size = 30
-        self.grid = [[0 for j in range(self.num_cols)] for i in range(self.num_rows)]
-        self.colours = Colours.get_cell_colours()
+        if num_rows < 4 or num_cols < 4:
+            raise ValueError(f"a board must be at least 4x4, got {num_rows}x{num_cols}")
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.full_row = (1 << self.num_cols) - 1
+        self.rows = [0] * self.num_rows
+        self.row_counts = [0] * self.num_rows
+        self.column_heights = [0] * self.num_cols
+        self.zobrist = zobrist_keys(self.num_rows, self.num_cols)
+        self.hash = 0
+        if cells is None:
+            cells = bytearray(self.num_rows * self.num_cols)
+        elif len(cells) != self.num_rows * self.num_cols:
+            raise ValueError(f"expected a buffer of {self.num_rows * self.num_cols} cells, got {len(cells)}")
+        self.cells = cells
+        view = memoryview(self.cells).toreadonly()
+        self.grid = [view[row*self.num_cols:(row+1)*self.num_cols] for row in range(self.num_rows)]
 
     def print_grid(self):
         """
@@ -32,102 +107,283 @@ class Grid:
         Args:
             row (int): The row index.
             column (int): The column index.
-        
+
         Returns:
             bool: True if inside the grid, else False.
         """
         if row >= 0 and row < self.num_rows and column >= 0 and column < self.num_cols:
             return True
         return False
-    
+
     def is_empty(self, row, column):
         """
         Check if a given cell is empty (is value 0)
-        
+
         Args:
             row (int): The row index.
             column (int): The column index.
-        
+
         Returns:
             bool: True if cell is empty, else False.
         """
-        if self.grid[row][column] == 0:
-            return True
+        return not (self.rows[row] >> column) & 1
+
+    def set_cell(self, row, column, value):
+        """
+        Write a block ID into a cell, keeping the row mask and colour plane in step.
+
+        Args:
+            row (int): The row index.
+            column (int): The column index.
+            value (int): The block ID to store, 0 to empty the cell.
+        """
+        index = row*self.num_cols + column
+        was_filled = self.cells[index] != 0
+        self.cells[index] = value
+        if value and not was_filled:
+            self.rows[row] |= 1 << column
+            self.row_counts[row] += 1
+            if self.hash is not None:
+                self.hash ^= self.zobrist[row][column]
+            if self.num_rows - row > self.column_heights[column]:
+                self.column_heights[column] = self.num_rows - row
+        elif was_filled and not value:
+            self.rows[row] &= ~(1 << column)
+            self.row_counts[row] -= 1
+            if self.hash is not None:
+                self.hash ^= self.zobrist[row][column]
+            if self.column_heights[column] == self.num_rows - row:
+                self.update_column_heights()
+
+    def update_column_heights(self):
+        """
+        Recalculate every column height from the row masks.
+        Walks down from the top row only until every column has been seen.
+        """
+        heights = [0] * self.num_cols
+        seen = 0
+        for row, mask in enumerate(self.rows):
+            new = mask & ~seen
+            while new:
+                lowest = new & -new
+                heights[lowest.bit_length() - 1] = self.num_rows - row
+                new ^= lowest
+            seen |= mask
+            if seen == self.full_row:
+                break
+        self.column_heights[:] = heights
+
+    def board_hash(self):
+        """
+        Get the Zobrist hash of the board, rebuilding it from the row masks if a clear
+        has left it unknown.
+
+        Returns:
+            int: The hash of which cells are occupied.
+        """
+        if self.hash is None:
+            value = 0
+            for row, mask in enumerate(self.rows):
+                if mask:
+                    value ^= row_hash(self.zobrist[row], mask)
+            self.hash = value
+        return self.hash
+
+    def collides(self, row, column, row_masks):
+        """
+        Check if a piece overlaps any occupied cell.
+        The piece must already be known to be inside the grid.
+
+        Args:
+            row (int): Row offset of the piece.
+            column (int): Column offset of the piece.
+            row_masks (tuple[tuple[int, int]]): (row, mask) pairs describing the piece's
+                cells relative to its offset, bit c set for column c.
+
+        Returns:
+            bool: True if any cell of the piece is occupied, else False.
+        """
+        rows = self.rows
+        if column >= 0:
+            for piece_row, mask in row_masks:
+                if rows[row + piece_row] & (mask << column):
+                    return True
+        else:
+            # Only reached when the piece's leftmost cells are inside the grid,
+            # so shifting right never drops an occupied bit.
+            for piece_row, mask in row_masks:
+                if rows[row + piece_row] & (mask >> -column):
+                    return True
         return False
-    
+
+    def drop_distance(self, row, column, rotation):
+        """
+        Get how many rows a piece can fall before it lands.
+        Uses the column height map, so the cost depends on the piece's width, not the board's height.
+        Falls back to stepping down one row at a time only when the piece is tucked under an overhang.
+
+        Args:
+            row (int): Row offset of the piece.
+            column (int): Column offset of the piece.
+            rotation (Rotation): The piece's current rotation.
+
+        Returns:
+            int: Number of rows the piece can move down.
+        """
+        distance = self.num_rows
+        for piece_column, bottom in rotation.column_bottoms:
+            surface = self.num_rows - self.column_heights[column + piece_column]
+            bottom += row
+            if bottom >= surface:
+                distance = 0
+                while (row + distance + 1 + rotation.max_row < self.num_rows
+                       and not self.collides(row + distance + 1, column, rotation.row_masks)):
+                    distance += 1
+                return distance
+            distance = min(distance, surface - bottom - 1)
+        return distance
+
     def is_row_full(self, row):
         """
         Check if specified row is completed(All non 0 values)
-        
+
         Args:
             row (int): The row index to check.
-        
+
         Returns:
             bool: True if the row is full, else False
         """
-        for column in range(self.num_cols):
-            if self.grid[row][column] == 0:
-                return False
-        return True
-    
+        return self.rows[row] == self.full_row
+
     def clear_row(self, row):
         """
         Clear all cells in a specified row, setting them to 0
-        
+
         Args:
             row (int): The row index to clear.
         """
-        for column in range(self.num_cols):
-            self.grid[row][column] = 0
+        self.hash = None
+        self.rows[row] = 0
+        self.row_counts[row] = 0
+        self.cells[row*self.num_cols:(row+1)*self.num_cols] = bytes(self.num_cols)
+        self.update_column_heights()
 
     def move_row_down(self, row, num_rows):
         """
         Move a given row down by a specified number of rows.
         Used when rows have been cleared and need to drop blocks in board.
-        
+
         Args:
             row (int): The row index to move.
             num_rows (int): The amount of rows to move down.
         """
-        for column in range(self.num_cols):
-            self.grid[row+num_rows][column] = self.grid[row][column]
-            self.grid[row][column] = 0
+        cols = self.num_cols
+        self.rows[row+num_rows] = self.rows[row]
+        self.row_counts[row+num_rows] = self.row_counts[row]
+        self.cells[(row+num_rows)*cols:(row+num_rows+1)*cols] = self.cells[row*cols:(row+1)*cols]
+        self.clear_row(row)
 
-    def clear_full_rows(self):
+    def clear_full_rows(self, candidates=None):
         """
         Clear all fully filled rows in the grid.
         Move rows above downward to fill empty space.
-        
+
+        Args:
+            candidates (iterable[int]): Rows that may have become full, e.g. the rows a locked
+                piece touched. Every row is checked when omitted.
+
         Returns:
             int: The number of rows cleared.
         """
-        completed = 0
-        for row in range(self.num_rows - 1, 0, -1):
-            if self.is_row_full(row):
-                self.clear_row(row)
-                completed += 1
-            elif completed > 0:
-                self.move_row_down(row, completed)
+        if candidates is None:
+            candidates = range(self.num_rows)
+        full = [row for row in candidates if self.row_counts[row] == self.num_cols]
+        if not full:
+            return 0
+        kept = [row for row in range(self.num_rows) if self.row_counts[row] != self.num_cols]
+        completed = self.num_rows - len(kept)
+        cols = self.num_cols
+        cells = self.cells
+        # Splice out the full rows; the colour plane keeps its size so the row views stay valid.
+        cells[:] = bytes(completed * cols) + b"".join([cells[row*cols:(row+1)*cols] for row in kept])
+        self.rows[:] = [0] * completed + [self.rows[row] for row in kept]
+        self.hash = None
+        self.row_counts[:] = [0] * completed + [self.row_counts[row] for row in kept]
+        self.update_column_heights()
         return completed
-    
+
     def reset(self):
         """
         Reset the entire grid to 0s
         """
-        for row in range(self.num_rows):
-            for column in range (self.num_cols):
-                self.grid[row][column] = 0
+        self.rows[:] = [0] * self.num_rows
+        self.row_counts[:] = [0] * self.num_rows
+        self.column_heights[:] = [0] * self.num_cols
+        self.hash = 0
+        self.cells[:] = bytes(len(self.cells))
+
+    def snapshot(self):
+        """
+        Capture the board cheaply, for restore() to return to later.
+
+        Returns:
+            tuple: The cells and row masks, counts, column heights and hash.
+        """
+        return (bytes(self.cells), tuple(self.rows), tuple(self.row_counts), tuple(self.column_heights), self.hash)
+
+    def restore(self, snapshot):
+        """
+        Return the board to a snapshot taken from this grid or one of the same size.
+        The board is written in place, so the row views stay valid.
+
+        Args:
+            snapshot (tuple): A value returned by snapshot().
+        """
+        cells, rows, row_counts, column_heights, self.hash = snapshot
+        self.cells[:] = cells
+        self.rows[:] = rows
+        self.row_counts[:] = row_counts
+        self.column_heights[:] = column_heights
+
+    def copy(self):
+        """
+        Make an independent grid with the same cells. The Zobrist keys are shared.
 
-    def draw(self, screen):
+        Returns:
+            Grid: The copy, with its own colour plane in a new bytearray.
         """
-        Draw the grid and all occupied cells on the screen.
-        
+        grid = Grid.__new__(Grid)
+        grid.num_rows = self.num_rows
+        grid.num_cols = self.num_cols
+        grid.full_row = self.full_row
+        grid.rows = self.rows[:]
+        grid.row_counts = self.row_counts[:]
+        grid.column_heights = self.column_heights[:]
+        grid.zobrist = self.zobrist
+        grid.hash = self.hash
+        grid.cells = bytearray(self.cells)
+        view = memoryview(grid.cells).toreadonly()
+        grid.grid = [view[row*self.num_cols:(row+1)*self.num_cols] for row in range(self.num_rows)]
+        return grid
+
+    def load_cells(self, cells):
+        """
+        Replace the whole board, e.g. when restoring a saved game.
+        The row masks, counts, heights and hash are rebuilt from the new cells.
+
         Args:
-            screen (pygame.Surface): The surface on which to render the grid.
+            cells (bytes): num_rows * num_cols block IDs, row by row.
         """
+        if len(cells) != len(self.cells):
+            raise ValueError(f"expected {len(self.cells)} cells, got {len(cells)}")
+        self.cells[:] = cells
+        self.hash = 0
         for row in range(self.num_rows):
-            for column in range(self.num_cols):
-                cell_value = self.grid[row][column]
-                cell_rect = pygame.Rect(column*self.cell_size + 11, row*self.cell_size + 11,
-                                        self.cell_size -1, self.cell_size -1)
-                pygame.draw.rect(screen, self.colours[cell_value], cell_rect)
\ No newline at end of file
+            mask = 0
+            for column, value in enumerate(self.grid[row]):
+                if value:
+                    mask |= 1 << column
+            self.rows[row] = mask
+            self.row_counts[row] = mask.bit_count()
+            self.hash ^= row_hash(self.zobrist[row], mask)
+        self.update_column_heights()
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+import pygame
+from colours import Colours
+from profiler import PHASES
+
+class TextCache:
+    """
+    Small least-recently-used cache of rendered text surfaces.
+    Scores, levels and line counts repeat often, so each string is rasterised once.
+    """
+    def __init__(self, font, colour, max_entries=64):
+        """
+        Initialise an empty cache for one font and colour.
+
+        Args:
+            font (pygame.font.Font): The font used to render text.
+            colour (tuple[int, int, int]): The text colour.
+            max_entries (int): Most surfaces kept before the least recently used is dropped.
+        """
+        self.font = font
+        self.colour = colour
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+
+    def render(self, text):
+        """
+        Get the surface for a string, rendering it only on a cache miss.
+
+        Args:
+            text (str): The text to render.
+
+        Returns:
+            pygame.Surface: The rendered text.
+        """
+        surface = self.surfaces.get(text)
+        if surface is None:
+            surface = self.font.render(text, True, self.colour)
+            self.surfaces[text] = surface
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(text)
+        return surface
+
+
+class Hud:
+    """
+    The score, level and lines panels beside the board.
+    A panel is only redrawn when its value changes, and draw() reports it as a dirty rect.
+    """
+    def __init__(self, font, left=320):
+        """
+        Lay out the panels and pre-render their labels and backgrounds.
+
+        Args:
+            font (pygame.font.Font): The font used for labels and values.
+            left (int): X coordinate of the panels' left edge, just right of the board.
+        """
+        self.text = TextCache(font, Colours.text_white)
+        self.panels = [
+            (self.text.render("Score"), (left + 45, 20), pygame.Rect(left, 55, 170, 60)),
+            (self.text.render("Level"), (left + 45, 140), pygame.Rect(left, 175, 170, 60)),
+            (self.text.render("Lines"), (left + 45, 260), pygame.Rect(left, 295, 170, 60)),
+        ]
+        self.background = pygame.Surface((170, 60))
+        self.background.fill(Colours.board_colour)
+        pygame.draw.rect(self.background, Colours.board_colour_light, self.background.get_rect(), 0, 10)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Forget the values on screen so every panel is redrawn on the next draw().
+        """
+        self.drawn_values = [None] * len(self.panels)
+
+    def draw_labels(self, screen):
+        """
+        Draw the static panel titles.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+        """
+        for label, position, rect in self.panels:
+            screen.blit(label, position)
+
+    def draw(self, screen, values):
+        """
+        Redraw the panels whose value changed since the last call.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+            values (list[int]): Score, level and lines, in panel order.
+
+        Returns:
+            list[pygame.Rect]: The panels that were redrawn.
+        """
+        dirty = []
+        for index, (label, position, rect) in enumerate(self.panels):
+            if values[index] != self.drawn_values[index]:
+                value_surface = self.text.render(str(values[index]))
+                screen.blit(self.background, rect)
+                screen.blit(value_surface, value_surface.get_rect(center=rect.center))
+                self.drawn_values[index] = values[index]
+                dirty.append(rect)
+        return dirty
+
+
+class ProfilerOverlay:
+    """
+    Box over the top-left of the board showing frame times from a FrameProfiler.
+    The text is re-rendered a few times a second; in between the same surface is blitted.
+    The font is not monospaced, so the text's width changes with the figures; the box
+    only ever grows, since the board under it is not repainted where a wider box was.
+    """
+    def __init__(self, font, position=(11, 11), refresh_seconds=0.25):
+        """
+        Args:
+            font (pygame.font.Font): The font used for the figures.
+            position (tuple[int, int]): Top-left corner of the box on screen.
+            refresh_seconds (float): Seconds between updates of the figures.
+        """
+        self.font = font
+        self.position = position
+        self.refresh_seconds = refresh_seconds
+        self.surface = None
+        self.size = (0, 0)
+        self.refreshed = 0
+
+    def draw(self, screen, profiler, now):
+        """
+        Draw the box, updating its figures if they are due.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+            profiler (FrameProfiler): The profiler to report.
+            now (float): Current time in seconds.
+
+        Returns:
+            pygame.Rect: The area drawn.
+        """
+        if self.surface is None or now - self.refreshed >= self.refresh_seconds:
+            stats = profiler.stats()
+            if stats["frames"]:
+                lines = [f"frame p50 {stats['interval_p50']:5.1f}  p99 {stats['interval_p99']:5.1f} ms",
+                         f"work  p50 {stats['work_p50']:5.1f}  p99 {stats['work_p99']:5.1f} ms"]
+                lines += [f"{name:8} {stats[name]:6.2f} ms" for name in PHASES]
+            else:
+                lines = ["profiling..."]
+            surfaces = [self.font.render(line, True, Colours.text_white) for line in lines]
+            line_height = self.font.get_linesize()
+            self.size = (max(self.size[0], max(surface.get_width() for surface in surfaces) + 12),
+                         max(self.size[1], line_height * len(surfaces) + 8))
+            self.surface = pygame.Surface(self.size)
+            self.surface.fill(Colours.board_colour)
+            for index, surface in enumerate(surfaces):
+                self.surface.blit(surface, (6, 4 + index * line_height))
+            self.refreshed = now
+        return screen.blit(self.surface, self.position)
@@ -0,0 +1,197 @@
+from collections import deque
+import actions
+
+# Spare columns on each side of the padded row masks, enough for any piece's
+# column offset to stay non-negative while part of its 4x4 box hangs off the board.
+PAD = 4
+
+
+class ReachableStates:
+    """
+    Every (rotation, row, column) state a piece can reach from where it started.
+    Stored as one column bitmask per (rotation, row); bit k is column offset k - PAD.
+    Paths are worked out from these masks alone, so they stay valid if the grid later changes.
+    """
+    def __init__(self, rotations, start, reach):
+        """
+        Args:
+            rotations (int): Number of rotation states of the piece.
+            start (tuple[int, int, int]): The piece's (rotation, row, column) when the search began.
+            reach (dict[tuple[int, int], int]): Reachable column mask for each (rotation, row).
+        """
+        self.rotations = rotations
+        self.start = start
+        self.reach = reach
+        self.parents = None
+
+    def contains(self, rotation, row, column):
+        """
+        Returns:
+            bool: True if the piece can reach the given state.
+        """
+        return (self.reach.get((rotation, row), 0) >> (column + PAD)) & 1 == 1
+
+    def path_to(self, state):
+        """
+        Get the shortest list of inputs from the start state to a reachable state.
+        The breadth-first tree is built on the first call and shared by later ones.
+
+        Args:
+            state (tuple[int, int, int]): Target (rotation, row, column).
+
+        Returns:
+            list[int]: Action codes in the order they should be applied.
+        """
+        if self.parents is None:
+            self.parents = {self.start: None}
+            queue = deque([self.start])
+            while queue:
+                current = queue.popleft()
+                rotation, row, column = current
+                for action, next_state in ((actions.MOVE_LEFT, (rotation, row, column - 1)),
+                                           (actions.MOVE_RIGHT, (rotation, row, column + 1)),
+                                           (actions.ROTATE, ((rotation + 1) % self.rotations, row, column)),
+                                           (actions.MOVE_DOWN, (rotation, row + 1, column))):
+                    if next_state not in self.parents and self.contains(*next_state):
+                        self.parents[next_state] = (current, action)
+                        queue.append(next_state)
+        path = []
+        step = self.parents[state]
+        while step is not None:
+            state, action = step
+            path.append(action)
+            step = self.parents[state]
+        path.reverse()
+        return path
+
+
+class Placement:
+    """
+    A final resting position of a piece and the inputs that get it there.
+    """
+    __slots__ = ("rotation", "row", "column", "reachable")
+
+    def __init__(self, rotation, row, column, reachable):
+        """
+        Args:
+            rotation (int): Rotation state the piece locks in.
+            row (int): Row offset the piece locks at.
+            column (int): Column offset the piece locks at.
+            reachable (ReachableStates): The search this placement came from.
+        """
+        self.rotation = rotation
+        self.row = row
+        self.column = column
+        self.reachable = reachable
+
+    @property
+    def path(self):
+        """
+        tuple[int]: Action codes from the piece's starting state, ending with the MOVE_DOWN that locks it.
+        Worked out on first use, since most callers only need the path of the placement they pick.
+        """
+        return tuple(self.reachable.path_to((self.rotation, self.row, self.column))) + (actions.MOVE_DOWN,)
+
+    def __repr__(self):
+        return f"Placement(rotation={self.rotation}, row={self.row}, column={self.column})"
+
+
+def find_placements(grid, block):
+    """
+    Find every position where a piece can lock, using only the moves Game allows:
+    left, right, rotate (clockwise, no wall kicks) and down.
+
+    The search works a row at a time on column bitmasks. For each rotation and row the
+    columns where the piece fits are found with a few shifts of the grid's row masks
+    (memoised for the search); sideways moves then flood-fill along that mask, rotations
+    pass the mask to the next rotation state, and moving down carries it to the next row.
+    A piece locks wherever it is reachable but cannot move down. Placements covering the
+    same cells (e.g. the rotations of an O piece) are reported once.
+
+    Args:
+        grid (Grid): The board to search.
+        block (Block): The piece to place, in its current state. It is not modified.
+
+    Returns:
+        list[Placement]: One entry per distinct set of cells the piece can lock into.
+    """
+    rotations = block.rotations
+    num_rotations = len(rotations)
+    num_rows = grid.num_rows
+    width = grid.num_cols + 2 * PAD
+    all_columns = (1 << width) - 1
+    walls = all_columns & ~(grid.full_row << PAD)
+    padded_rows = [(mask << PAD) | walls for mask in grid.rows]
+    shapes = [[(piece_row, [bit for bit in range(PAD) if mask >> bit & 1]) for piece_row, mask in rotation.row_masks]
+              for rotation in rotations]
+    fits_cache = {}
+
+    def fits(rotation, row):
+        # Column mask of every offset where the piece fits in this rotation and row.
+        key = (rotation, row)
+        valid = fits_cache.get(key)
+        if valid is None:
+            blocked = 0
+            for piece_row, bits in shapes[rotation]:
+                board_row = row + piece_row
+                if 0 <= board_row < num_rows:
+                    padded = padded_rows[board_row]
+                    for bit in bits:
+                        blocked |= padded >> bit
+                else:
+                    blocked = all_columns
+                    break
+            valid = ~blocked & ((1 << (width - rotations[rotation].max_column)) - 1)
+            fits_cache[key] = valid
+        return valid
+
+    start_rotation = block.rotation_state
+    row = block.row_offset
+    start = (start_rotation, row, block.column_offset)
+    seeds = [0] * num_rotations
+    seeds[start_rotation] = (1 << (block.column_offset + PAD)) & fits(start_rotation, row)
+    reach = {}
+    locked = []
+    while any(seeds):
+        # Close the row under sideways moves and rotations.
+        current = [0] * num_rotations
+        changed = True
+        while changed:
+            changed = False
+            for rotation in range(num_rotations):
+                valid = fits(rotation, row)
+                spread = (seeds[rotation] | current[rotation]) & valid
+                while True:
+                    grown = (spread | (spread << 1) | (spread >> 1)) & valid
+                    if grown == spread:
+                        break
+                    spread = grown
+                if spread != current[rotation]:
+                    current[rotation] = spread
+                    changed = True
+                    next_rotation = (rotation + 1) % num_rotations
+                    seeds[next_rotation] |= spread & fits(next_rotation, row)
+        for rotation in range(num_rotations):
+            if current[rotation]:
+                reach[(rotation, row)] = current[rotation]
+                below = fits(rotation, row + 1)
+                locked.append((rotation, row, current[rotation] & ~below))
+                seeds[rotation] = current[rotation] & below
+            else:
+                seeds[rotation] = 0
+        row += 1
+
+    reachable = ReachableStates(num_rotations, start, reach)
+    placements = []
+    seen = set()
+    for rotation, row, columns in locked:
+        while columns:
+            lowest = columns & -columns
+            columns ^= lowest
+            column = lowest.bit_length() - 1 - PAD
+            cells = tuple((row + piece_row, mask << column if column >= 0 else mask >> -column)
+                          for piece_row, mask in rotations[rotation].row_masks)
+            if cells not in seen:
+                seen.add(cells)
+                placements.append(Placement(rotation, row, column, reachable))
+    return placements
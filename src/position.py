@@ -1,4 +1,6 @@
 class Position:
+    __slots__ = ("row", "column")
+
     def __init__(self, row, column):
         self.row = row
-        self.column = column
\ No newline at end of file
+        self.column = column
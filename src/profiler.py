@@ -0,0 +1,179 @@
+from array import array
+import json
+import math
+import time
+
+# Phases of the main loop, in the order they run. "hud" is timed inside "draw".
+PHASES = ("events", "controls", "logic", "draw", "hud", "display")
+EVENTS, CONTROLS, LOGIC, DRAW, HUD, DISPLAY = range(len(PHASES))
+
+
+class FrameProfiler:
+    """
+    Records how long each phase of the main loop takes, frame by frame.
+
+    Every timed span is kept in a fixed-size ring buffer of events (phase, start,
+    duration) for trace export, and the spans of each frame are summed into a second
+    ring buffer with one row per frame. Both are preallocated arrays, so recording
+    allocates nothing; once full, the oldest entries are overwritten.
+
+    The main loop only calls into the profiler when one exists, so leaving it off
+    costs a None check per phase.
+    """
+    def __init__(self, frames=1024, events=16384):
+        """
+        Args:
+            frames (int): Frames kept for statistics and CSV export.
+            events (int): Timed spans kept for trace export.
+        """
+        self.max_frames = frames
+        self.max_events = events
+        width = len(PHASES) + 2
+        # Each frame row: start time, interval since the previous frame, then each phase's total.
+        self.frame_rows = array("d", bytes(8 * frames * width))
+        self.frames = 0
+        self.current = [0.0] * len(PHASES)
+        self.event_phases = array("B", bytes(events))
+        self.event_starts = array("d", bytes(8 * events))
+        self.event_durations = array("d", bytes(8 * events))
+        self.events = 0
+        self.origin = time.perf_counter()
+        self.frame_start = self.origin
+
+    def record(self, phase, start):
+        """
+        Record a span of one phase that ends now.
+
+        Args:
+            phase (int): The phase, e.g. LOGIC.
+            start (float): time.perf_counter() when the span began.
+
+        Returns:
+            float: The current time, so the next span can start from it.
+        """
+        end = time.perf_counter()
+        slot = self.events % self.max_events
+        self.event_phases[slot] = phase
+        self.event_starts[slot] = start
+        self.event_durations[slot] = end - start
+        self.events += 1
+        self.current[phase] += end - start
+        return end
+
+    def end_frame(self):
+        """
+        Close the current frame after it has been shown and start the next one.
+        """
+        now = time.perf_counter()
+        width = len(PHASES) + 2
+        row = (self.frames % self.max_frames) * width
+        self.frame_rows[row] = self.frame_start
+        self.frame_rows[row + 1] = now - self.frame_start
+        for phase, seconds in enumerate(self.current):
+            self.frame_rows[row + 2 + phase] = seconds
+            self.current[phase] = 0.0
+        self.frames += 1
+        self.frame_start = now
+
+    def rows(self):
+        """
+        Get the recorded frames, oldest first.
+
+        Returns:
+            list[tuple[float]]: (start, interval, phase seconds...) per frame, times in seconds.
+        """
+        width = len(PHASES) + 2
+        count = min(self.frames, self.max_frames)
+        first = self.frames - count
+        rows = []
+        for frame in range(first, self.frames):
+            row = (frame % self.max_frames) * width
+            rows.append(tuple(self.frame_rows[row:row + width]))
+        return rows
+
+    def stats(self):
+        """
+        Summarise the recorded frames. Work is the time spent in the phases, excluding
+        sleeping; hud is already part of draw so it is not counted twice.
+
+        Returns:
+            dict: Frames, p50 and p99 of frame interval and work in milliseconds, and
+                each phase's mean in milliseconds.
+        """
+        rows = self.rows()
+        if not rows:
+            return {"frames": 0}
+        intervals = sorted(row[1] for row in rows)
+        work = sorted(sum(row[2:]) - row[2 + HUD] for row in rows)
+        stats = {
+            "frames": len(rows),
+            "interval_p50": percentile(intervals, 50) * 1000,
+            "interval_p99": percentile(intervals, 99) * 1000,
+            "work_p50": percentile(work, 50) * 1000,
+            "work_p99": percentile(work, 99) * 1000,
+        }
+        for phase, name in enumerate(PHASES):
+            stats[name] = sum(row[2 + phase] for row in rows) / len(rows) * 1000
+        return stats
+
+    def write_csv(self, path):
+        """
+        Write one line per recorded frame with its start, interval and phase times in milliseconds.
+
+        Args:
+            path (str): File to write.
+        """
+        with open(path, "w") as file:
+            file.write(",".join(("frame", "start_ms", "interval_ms") + tuple(f"{name}_ms" for name in PHASES)) + "\n")
+            first = self.frames - min(self.frames, self.max_frames)
+            for frame, row in enumerate(self.rows(), first):
+                values = [(row[0] - self.origin) * 1000] + [value * 1000 for value in row[1:]]
+                file.write(f"{frame}," + ",".join(f"{value:.3f}" for value in values) + "\n")
+
+    def write_chrome_trace(self, path):
+        """
+        Write the recorded spans in the Chrome trace event format, for chrome://tracing
+        or Perfetto. Frames are shown on their own track above the phases.
+
+        Args:
+            path (str): File to write.
+        """
+        events = []
+        for start, interval, *phases in self.rows():
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": (start - self.origin) * 1e6, "dur": interval * 1e6})
+        count = min(self.events, self.max_events)
+        for event in range(self.events - count, self.events):
+            slot = event % self.max_events
+            events.append({"name": PHASES[self.event_phases[slot]], "ph": "X", "pid": 1, "tid": 2,
+                           "ts": (self.event_starts[slot] - self.origin) * 1e6,
+                           "dur": self.event_durations[slot] * 1e6})
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def export(self, path):
+        """
+        Write a CSV file if the path ends in .csv, otherwise a Chrome trace.
+
+        Args:
+            path (str): File to write.
+        """
+        if path.lower().endswith(".csv"):
+            self.write_csv(path)
+        else:
+            self.write_chrome_trace(path)
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of sorted values.
+
+    Args:
+        values (list[float]): Values in ascending order, at least one.
+        percent (float): Percentile to take, 0 to 100.
+
+    Returns:
+        float: The value at that percentile.
+    """
+    rank = max(0, min(len(values) - 1, math.ceil(percent / 100 * len(values)) - 1))
+    return values[rank]
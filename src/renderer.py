@@ -0,0 +1,262 @@
+import time
+import pygame
+from colours import Colours
+from hud import Hud
+from profiler import HUD
+
+# Gap between the window edge and the board, and between the board and the side panels.
+MARGIN = 11
+PANEL_GAP = 9
+PANEL_WIDTH = 170
+# Height the side panels need, so the window is never shorter than this.
+MIN_WINDOW_HEIGHT = 620
+# The next piece is always previewed at the standard cell size, whatever the board's.
+PREVIEW_CELL_SIZE = 30
+
+class Renderer:
+    """
+    Draws the state of a Game onto a Pygame surface.
+    Keeps all pygame drawing out of the game logic so the engine can run headless.
+
+    Only the parts of the scene that changed since the previous frame are redrawn:
+    board cells (including the falling piece), HUD panels whose value changed and
+    the next piece panel. draw() returns the rectangles that were touched so the
+    caller can pass them straight to pygame.display.update.
+
+    Cells are drawn by blitting pre-rendered tiles, one per block ID, in a single
+    batched Surface.blits call rather than one pygame.draw.rect per cell. The layout
+    follows the board and cell size: the side panels sit to the right of the board
+    and `window_size` is the window that fits both, and `regions` divides it into
+    parts a Viewport can scale separately. An empty board is pre-rendered,
+    so a full repaint only blits the filled cells and finding changed cells compares
+    whole rows first, which keeps large boards cheap to draw.
+    """
+    def __init__(self, num_rows=20, num_cols=10, cell_size=30):
+        """
+        Initialise the renderer with the board and cell size, colour mapping, fonts and HUD layout.
+        Requires pygame.font to be initialised.
+
+        Args:
+            num_rows (int): Rows of the boards that will be drawn.
+            num_cols (int): Columns of the boards that will be drawn.
+            cell_size (int): Width and height of a single cell in pixels.
+        """
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.colours = Colours.get_cell_colours()
+        self.preview_tiles = self.build_tiles(PREVIEW_CELL_SIZE)
+
+        # --- Fonts and UI setup ---
+        self.game_font = pygame.font.Font(None, 40)
+        game_over_font = pygame.font.Font(None, 60)
+        self.game_over_text = game_over_font.render("Game Over!", True, Colours.text_black)
+        self.set_cell_size(cell_size)
+
+    def build_tiles(self, cell_size):
+        """
+        Render one tile per block ID, a pixel smaller than the cell so a grid line shows between cells.
+
+        Args:
+            cell_size (int): Width and height of a cell in pixels.
+
+        Returns:
+            list[pygame.Surface]: The tiles, indexed by block ID.
+        """
+        tiles = []
+        for colour in self.colours:
+            tile = pygame.Surface((cell_size - 1, cell_size - 1))
+            tile.fill(colour)
+            tiles.append(tile)
+        return tiles
+
+    def set_cell_size(self, cell_size):
+        """
+        Change the cell size, rebuild the tiles and empty board to match and lay out the window around them.
+
+        Args:
+            cell_size (int): Width and height of a single cell in pixels.
+        """
+        self.cell_size = cell_size
+        self.tiles = self.build_tiles(cell_size)
+        self.cell_positions = {}
+
+        self.board_rect = pygame.Rect(MARGIN, MARGIN, self.num_cols * cell_size, self.num_rows * cell_size)
+        panel_left = self.board_rect.right + PANEL_GAP
+        self.window_size = (panel_left + PANEL_WIDTH + MARGIN - 1,
+                            max(self.board_rect.bottom + PANEL_GAP, MIN_WINDOW_HEIGHT))
+        self.hud = Hud(self.game_font, panel_left)
+        self.next_rect = pygame.Rect(panel_left, 415, PANEL_WIDTH, 180)
+        # The message is shrunk to fit boards narrower than it.
+        self.game_over_surface = self.game_over_text
+        width, height = self.game_over_text.get_size()
+        if width > self.board_rect.width:
+            self.game_over_surface = pygame.transform.smoothscale(
+                self.game_over_text, (self.board_rect.width, height * self.board_rect.width // width))
+        self.game_over_position = (self.board_rect.x + (self.board_rect.width - self.game_over_surface.get_width()) // 2,
+                                   self.board_rect.centery - 34)
+
+        # The window cut into parts with only plain background along their edges, so each can be
+        # scaled on its own: the board's column, then one band per panel down the right.
+        split = self.board_rect.right + PANEL_GAP // 2
+        width, height = self.window_size
+        sections = [label.get_rect(topleft=position).union(rect) for label, position, rect in self.hud.panels]
+        sections.append(self.next_rect)
+        cuts = [0] + [(above.bottom + below.top) // 2 for above, below in zip(sections, sections[1:])] + [height]
+        self.regions = [pygame.Rect(0, 0, split, height)]
+        self.regions += [pygame.Rect(split, top, width - split, bottom - top) for top, bottom in zip(cuts, cuts[1:])]
+
+        self.empty_board = pygame.Surface(self.board_rect.size)
+        self.empty_board.fill(Colours.board_colour)
+        self.empty_board.blits([(self.tiles[0], (column * cell_size, row * cell_size))
+                                for row in range(self.num_rows) for column in range(self.num_cols)], False)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Forget what is on screen so the next draw() repaints the whole window.
+        """
+        self.drawn_cells = None
+        self.drawn_next = None
+        self.drawn_game_over = None
+
+    def cell_position(self, grid, index):
+        """
+        Get the top-left screen position of a board cell, cached per cell index.
+
+        Args:
+            grid (Grid): The grid the cell belongs to.
+            index (int): The cell's index in the colour plane, row * num_cols + column.
+
+        Returns:
+            tuple[int, int]: The cell's top-left corner on screen.
+        """
+        position = self.cell_positions.get(index)
+        if position is None:
+            row, column = divmod(index, grid.num_cols)
+            position = (column*self.cell_size + MARGIN, row*self.cell_size + MARGIN)
+            self.cell_positions[index] = position
+        return position
+
+    def draw_grid(self, screen, grid):
+        """
+        Draw the grid and all occupied cells on the screen.
+
+        Args:
+            screen (pygame.Surface): The surface on which to render the grid.
+            grid (Grid): The grid to draw.
+        """
+        tiles = self.tiles
+        screen.blits([(tiles[cell_value], self.cell_position(grid, index))
+                      for index, cell_value in enumerate(grid.cells)], False)
+
+    def draw_block(self, screen, block, offset_x, offset_y):
+        """
+        Draw a piece on the given Pygame surface at the specified screen offset.
+
+        Args:
+            screen (pygame.Surface): The Pygame surface to draw the piece on.
+            block (Block): The piece to draw.
+            offset_x (int): horizontal offset in pixels for drawing.
+            offset_y (int): vertical offset in pixels for drawing.
+        """
+        tile = self.tiles[block.id]
+        screen.blits([(tile, (offset_x + (column + block.column_offset) * self.cell_size,
+                              offset_y + (row + block.row_offset) * self.cell_size))
+                      for row, column in block.get_rotation().cells], False)
+
+    def draw_next(self, screen, block):
+        """
+        Draw the next piece panel, with the piece centred in it.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+            block (Block): The next piece.
+        """
+        pygame.draw.rect(screen, Colours.board_colour_light, self.next_rect, 0, 10)
+        rotation = block.get_rotation()
+        width = (rotation.max_column - rotation.min_column + 1) * PREVIEW_CELL_SIZE
+        height = (rotation.max_row - rotation.min_row + 1) * PREVIEW_CELL_SIZE
+        left = self.next_rect.x + (self.next_rect.width - width) // 2 - rotation.min_column * PREVIEW_CELL_SIZE
+        top = self.next_rect.y + (self.next_rect.height - height) // 2 - rotation.min_row * PREVIEW_CELL_SIZE
+        tile = self.preview_tiles[block.id]
+        screen.blits([(tile, (left + column * PREVIEW_CELL_SIZE, top + row * PREVIEW_CELL_SIZE))
+                      for row, column in rotation.cells], False)
+
+    def board_cells(self, game):
+        """
+        Get the block IDs shown on the board: the locked cells plus the falling piece.
+
+        Args:
+            game (Game): The game to read.
+
+        Returns:
+            bytearray: One block ID per cell, row by row.
+        """
+        grid = game.grid
+        cells = bytearray(grid.cells)
+        block = game.current_block
+        for row, column in block.get_rotation().cells:
+            row += block.row_offset
+            column += block.column_offset
+            if grid.is_inside(row, column):
+                cells[row*grid.num_cols + column] = block.id
+        return cells
+
+    def draw(self, screen, game, profiler=None):
+        """
+        Render whatever changed since the last call, including the grid, current block,
+        next block and HUD panels.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+            game (Game): The game to render.
+            profiler (FrameProfiler): Optional profiler that times the HUD panels.
+
+        Returns:
+            list[pygame.Rect]: The areas of the screen that were redrawn. Empty when nothing changed.
+        """
+        if game.game_over != self.drawn_game_over:
+            # The overlay covers the board, so the whole scene is repainted when it appears or goes.
+            self.invalidate()
+        cells = self.board_cells(game)
+        dirty = []
+
+        if self.drawn_cells is None:
+            screen.fill(Colours.board_colour)
+            self.hud.invalidate()
+            self.hud.draw_labels(screen)
+            screen.blit(self.empty_board, self.board_rect)
+            tiles = self.tiles
+            screen.blits([(tiles[cell_value], self.cell_position(game.grid, index))
+                          for index, cell_value in enumerate(cells) if cell_value], False)
+            dirty.append(screen.get_rect())
+        elif cells != self.drawn_cells:
+            tiles = self.tiles
+            drawn = self.drawn_cells
+            num_cols = game.grid.num_cols
+            blits = []
+            # Rows are compared as a whole first, so only the rows that changed are scanned cell by cell.
+            for start in range(0, len(cells), num_cols):
+                end = start + num_cols
+                if cells[start:end] != drawn[start:end]:
+                    blits.extend((tiles[cells[index]], self.cell_position(game.grid, index))
+                                 for index in range(start, end) if cells[index] != drawn[index])
+            changed = screen.blits(blits)
+            dirty.append(changed[0].unionall(changed[1:]))
+        self.drawn_cells = cells
+
+        if profiler:
+            start = time.perf_counter()
+        dirty.extend(self.hud.draw(screen, [game.score, game.level, game.total_lines_cleared]))
+        if profiler:
+            profiler.record(HUD, start)
+
+        if game.next_block.id != self.drawn_next:
+            self.draw_next(screen, game.next_block)
+            dirty.append(self.next_rect)
+            self.drawn_next = game.next_block.id
+
+        if game.game_over and game.game_over != self.drawn_game_over:
+            screen.blit(self.game_over_surface, self.game_over_position)
+        self.drawn_game_over = game.game_over
+        return dirty
@@ -0,0 +1,406 @@
+"""
+Compact binary replays of a Game.
+
+A replay holds the game's seed and every action applied to it, each stamped with
+the logic tick it happened on. Since the pieces come from the game's own seeded
+generator and gravity only advances on ticks, feeding the same actions in at the
+same ticks reproduces the game exactly. Run this module on a file to check it:
+
+    python src/replay.py session.dbr
+
+Every few seconds of play a keyframe holding the full Game.pack_state() is written
+into the stream, and an index of keyframes closes the file, so ReplayReader can map
+the file and jump to any tick by re-simulating from the nearest keyframe only.
+
+Layout (integers are unsigned LEB128 varints unless noted):
+
+    b"DBRP", version byte, tick rate, rows, columns, seed, keyframe interval
+    records: ticks since the previous record, then a type byte:
+        an action code, followed by nothing
+        KEYFRAME, followed by the packed state's length and the packed state
+        END, followed by the packed final state's length and the packed final state
+    index: one little-endian (uint64 tick, uint64 file offset) pair per keyframe,
+           the offset pointing at the keyframe's length varint
+    footer: uint64 index offset, uint32 keyframe count, b"DBRI"
+"""
+import mmap
+import struct
+import sys
+import time
+from game import Game
+from grid import Grid
+from timing import FixedTimestep
+
+MAGIC = b"DBRP"
+VERSION = 3
+# Record types. Action codes run from 1 to 7, so neither can be mistaken for one.
+END = 0
+KEYFRAME = 0xFF
+INDEX_ENTRY = struct.Struct("<QQ")
+FOOTER = struct.Struct("<QI4s")
+FOOTER_MAGIC = b"DBRI"
+
+
+class ReplayMismatch(Exception):
+    """
+    Raised when re-simulating a replay does not reach the state it recorded.
+    """
+
+
+def write_varint(out, value):
+    """
+    Append an unsigned integer as a LEB128 varint: 7 bits per byte, low bits first.
+
+    Args:
+        out (bytearray): Buffer to append to.
+        value (int): Non-negative integer.
+    """
+    if value < 0:
+        raise ValueError(f"varints are unsigned, got {value}")
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, position):
+    """
+    Read an unsigned LEB128 varint.
+
+    Args:
+        data (bytes): The encoded replay.
+        position (int): Index of the varint's first byte.
+
+    Returns:
+        tuple[int, int]: The value and the index just after it.
+    """
+    value = 0
+    shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError("replay is truncated")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def read_header(data):
+    """
+    Check a replay's magic and version and read its header.
+
+    Args:
+        data (bytes): The encoded replay.
+
+    Returns:
+        tuple[dict, int]: tick_rate, num_rows, num_cols, seed and keyframe_interval,
+            and the index of the first record.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a Drop Block replay")
+    if data[len(MAGIC)] != VERSION:
+        raise ValueError(f"unsupported replay version {data[len(MAGIC)]}")
+    position = len(MAGIC) + 1
+    header = {}
+    for name in ("tick_rate", "num_rows", "num_cols", "seed", "keyframe_interval"):
+        header[name], position = read_varint(data, position)
+    return header, position
+
+
+def read_state(data, position):
+    """
+    Read a length-prefixed packed state.
+
+    Args:
+        data (bytes): The encoded replay.
+        position (int): Index of the state's length varint.
+
+    Returns:
+        tuple[bytes, int]: The packed state and the index just after it.
+    """
+    length, position = read_varint(data, position)
+    if position + length > len(data):
+        raise ValueError("replay is truncated")
+    return bytes(data[position:position + length]), position + length
+
+
+class ReplayRecorder:
+    """
+    Records every action applied to a Game. Attaches itself as the game's recorder,
+    so human input, the bot and resets are all captured through Game.apply_action.
+    A keyframe is written with the first action after each keyframe interval.
+    """
+    def __init__(self, game, tick_rate=240, keyframe_seconds=10):
+        """
+        Args:
+            game (Game): The game to record.
+            tick_rate (int): Logic ticks per second the game is run at.
+            keyframe_seconds (float): Play time between keyframes.
+        """
+        self.game = game
+        self.keyframe_interval = max(1, round(keyframe_seconds * tick_rate))
+        self.data = bytearray(MAGIC)
+        self.data.append(VERSION)
+        for value in (tick_rate, game.grid.num_rows, game.grid.num_cols, game.seed, self.keyframe_interval):
+            write_varint(self.data, value)
+        self.index = []
+        self.last_tick = game.ticks
+        self.actions = 0
+        self.write_keyframe(game.ticks)
+        game.recorder = self
+
+    def write_keyframe(self, tick):
+        """
+        Append the game's full state as a keyframe and add it to the index.
+
+        Args:
+            tick (int): The game's current tick.
+        """
+        write_varint(self.data, tick - self.last_tick)
+        self.data.append(KEYFRAME)
+        self.index.append((tick, len(self.data)))
+        state = self.game.pack_state()
+        write_varint(self.data, len(state))
+        self.data += state
+        self.last_tick = tick
+
+    def record(self, tick, action):
+        """
+        Append one action. Called by Game.apply_action before the action is applied.
+
+        Args:
+            tick (int): Logic tick the action was applied on.
+            action (int): Action code from actions.py.
+        """
+        if tick - self.index[-1][0] >= self.keyframe_interval:
+            self.write_keyframe(tick)
+        write_varint(self.data, tick - self.last_tick)
+        self.data.append(action)
+        self.last_tick = tick
+        self.actions += 1
+
+    def finish(self):
+        """
+        Close the log with the game's final state and the keyframe index.
+
+        Returns:
+            bytes: The complete replay.
+        """
+        data = bytearray(self.data)
+        write_varint(data, self.game.ticks - self.last_tick)
+        data.append(END)
+        state = self.game.pack_state()
+        write_varint(data, len(state))
+        data += state
+        index_offset = len(data)
+        for tick, offset in self.index:
+            data += INDEX_ENTRY.pack(tick, offset)
+        data += FOOTER.pack(index_offset, len(self.index), FOOTER_MAGIC)
+        return bytes(data)
+
+    def save(self, path):
+        """
+        Finish the replay and write it to a file.
+
+        Args:
+            path (str): File to write.
+        """
+        with open(path, "wb") as file:
+            file.write(self.finish())
+
+
+def new_game(header):
+    """
+    Create the game a replay starts from: its seed on a board of its size.
+
+    Args:
+        header (dict): The replay's header, from read_header.
+
+    Returns:
+        Game: The new game.
+    """
+    return Game(seed=header["seed"], grid=Grid(header["num_rows"], header["num_cols"]))
+
+
+def replay(data):
+    """
+    Re-simulate a whole replay headlessly from its seed, as fast as the engine runs.
+    Each keyframe is checked against the simulated state on the way.
+
+    Args:
+        data (bytes): A replay written by ReplayRecorder.
+
+    Returns:
+        tuple[Game, Game]: The simulated game in its final state, and the final state
+            the replay recorded, loaded into a second Game.
+
+    Raises:
+        ReplayMismatch: If a keyframe differs from the simulated state.
+    """
+    header, position = read_header(data)
+    tick_ms = FixedTimestep(header["tick_rate"]).tick_ms
+    game = new_game(header)
+    tick = game.tick
+    apply_action = game.apply_action
+    while True:
+        delta, position = read_varint(data, position)
+        for _ in range(delta):
+            tick(tick_ms)
+        if position >= len(data):
+            raise ValueError("replay is truncated")
+        action = data[position]
+        position += 1
+        if action == KEYFRAME:
+            state, position = read_state(data, position)
+            if game.pack_state() != state:
+                raise ReplayMismatch(f"state differs from the keyframe at tick {game.ticks}")
+        elif action == END:
+            break
+        else:
+            apply_action(action)
+    state, position = read_state(data, position)
+    expected = new_game(header)
+    expected.load_state(state)
+    return game, expected
+
+
+def verify(data):
+    """
+    Re-simulate a replay and check it ends with the recorded score and grid.
+
+    Args:
+        data (bytes): A replay written by ReplayRecorder.
+
+    Returns:
+        Game: The game in its final state.
+
+    Raises:
+        ReplayMismatch: If a keyframe, or the final score, level, lines cleared or grid, differ.
+    """
+    game, expected = replay(data)
+    for name in ("ticks", "score", "level", "total_lines_cleared"):
+        value, recorded = getattr(game, name), getattr(expected, name)
+        if value != recorded:
+            raise ReplayMismatch(f"{name} is {value}, recorded {recorded}")
+    if game.grid.cells != expected.grid.cells:
+        raise ReplayMismatch("final grid differs from the recorded grid")
+    if game.pack_state() != expected.pack_state():
+        raise ReplayMismatch("final state differs from the recorded state")
+    return game
+
+
+class ReplayReader:
+    """
+    Random access to a replay file. The file is memory-mapped; seeking finds the last
+    keyframe at or before the target tick with a binary search over the fixed-size index
+    at the end of the file, so only the index entries probed and one segment are read.
+    """
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Replay file written by ReplayRecorder.
+        """
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = read_header(self.data)[0]
+        self.tick_ms = FixedTimestep(self.header["tick_rate"]).tick_ms
+        if len(self.data) < FOOTER.size:
+            raise ValueError("replay is truncated")
+        self.index_offset, self.keyframes, magic = FOOTER.unpack_from(self.data, len(self.data) - FOOTER.size)
+        if magic != FOOTER_MAGIC:
+            raise ValueError("replay has no keyframe index")
+        final = new_game(self.header)
+        final.load_state(self.final_state())
+        self.end_tick = final.ticks
+
+    def keyframe(self, number):
+        """
+        Args:
+            number (int): Position of the keyframe in the index.
+
+        Returns:
+            tuple[int, int]: The keyframe's tick and the file offset of its state.
+        """
+        return INDEX_ENTRY.unpack_from(self.data, self.index_offset + number * INDEX_ENTRY.size)
+
+    def final_state(self):
+        """
+        Get the packed state the recording ended with. Only the segment after the last
+        keyframe is read to find it.
+
+        Returns:
+            bytes: The packed final state.
+        """
+        position = read_state(self.data, self.keyframe(self.keyframes - 1)[1])[1]
+        while True:
+            delta, position = read_varint(self.data, position)
+            action = self.data[position]
+            position += 1
+            if action == END:
+                return read_state(self.data, position)[0]
+
+    def seek(self, target):
+        """
+        Rebuild the game as it was at the start of a tick, before that tick's actions.
+
+        Args:
+            target (int): Tick to seek to. Clamped to the length of the recording.
+
+        Returns:
+            Game: A new game in that state, without sounds or a recorder.
+        """
+        target = max(0, min(target, self.end_tick))
+        low, high = 0, self.keyframes - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.keyframe(middle)[0] <= target:
+                low = middle
+            else:
+                high = middle - 1
+        tick, position = self.keyframe(low)
+        state, position = read_state(self.data, position)
+        game = new_game(self.header)
+        game.load_state(state)
+        data = self.data
+        while tick < target:
+            delta, position = read_varint(data, position)
+            for _ in range(min(delta, target - tick)):
+                game.tick(self.tick_ms)
+            tick += delta
+            if tick >= target:
+                break
+            action = data[position]
+            position += 1
+            if action == END:
+                break
+            if action == KEYFRAME:
+                position = read_state(data, position)[1]
+            else:
+                game.apply_action(action)
+        return game
+
+    def close(self):
+        """
+        Unmap and close the file.
+        """
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], "rb") as file:
+        data = file.read()
+    start = time.perf_counter()
+    game = verify(data)
+    elapsed = time.perf_counter() - start
+    played = game.ticks / read_header(data)[0]["tick_rate"]
+    print(f"OK: score {game.score}, level {game.level}, {game.total_lines_cleared} lines, {game.ticks} ticks")
+    print(f"{played:.1f}s of play re-simulated in {elapsed:.3f}s ({played / elapsed:,.0f}x real time)")
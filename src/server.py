@@ -0,0 +1,535 @@
+"""
+Local multiplayer server hosting many headless games at once.
+
+Every board is a Game on one asyncio event loop. There is no fixed tick: each
+board's next gravity drop is due get_drop_speed() milliseconds (less what its
+gravity timer already holds) after its last one, and one scheduler task keeps the
+boards in a heap ordered by that time and sleeps until the earliest is due. Player
+actions are applied as soon as they are read. Changed boards are sent out at most
+`send_rate` times a second, and only the rows that changed since the board was last
+sent, so a frame where only the falling piece moved carries no rows at all. Each
+update is encoded once and written to every subscriber of the board.
+
+A versus match is two players each creating a board with the same seed and
+watching the other's; a spectator just watches boards. Run it with
+
+    python src/server.py --port 7777
+
+Protocol (little-endian). A client sends fixed-size COMMANDs (code, argument):
+
+    NEW, seed      create a board (seed 0 for a random one) and play it; earlier boards are closed
+    WATCH, board   subscribe to a board's updates
+    ACTION, code   apply an action code from actions.py to the board being played
+
+and receives messages that each start with a type byte:
+
+    WELCOME        board id, rows, columns; sent on NEW and WATCH, then a full UPDATE
+    UPDATE         board id, score, level, lines, flags (1 paused, 2 game over),
+                   the falling piece (index, rotation, row, column), the next piece and the
+                   number of rows that follow, each a uint16 row index and one byte per cell
+    CLOSED         board id; the board's player has left or started a new board
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import struct
+import time
+from collections import deque
+from blocks import PIECES
+from game import Game
+from grid import Grid
+
+# Client commands.
+NEW = 1
+WATCH = 2
+ACTION = 3
+COMMAND = struct.Struct("<BI")
+# Server messages.
+WELCOME = 1
+UPDATE = 2
+CLOSED = 3
+WELCOME_MESSAGE = struct.Struct("<BIHH")
+UPDATE_HEADER = struct.Struct("<BIQIIBBBhhBH")
+ROW_INDEX = struct.Struct("<H")
+CLOSED_MESSAGE = struct.Struct("<BI")
+PAUSED_FLAG = 1
+GAME_OVER_FLAG = 2
+# A client that has this many bytes of updates still unsent is too slow to follow and is dropped.
+MAX_BUFFERED = 1 << 20
+
+
+class HostedBoard:
+    """
+    One game hosted by the server: the Game, who receives its updates, when its
+    gravity is next due and what was last sent of it.
+    """
+    def __init__(self, board_id, game, player):
+        """
+        Args:
+            board_id (int): The board's id, unique for the server's lifetime.
+            game (Game): The game played on it.
+            player (Client): The client playing it.
+        """
+        self.board_id = board_id
+        self.game = game
+        self.player = player
+        self.subscribers = [player]
+        self.last_gravity = 0.0
+        self.due = None
+        # The colour plane as last sent, and each row of it, to find the rows that changed.
+        # Subscribers start from a full update, so the board as created counts as sent.
+        self.sent_cells = bytes(game.grid.cells)
+        num_cols = game.grid.num_cols
+        self.sent_rows = [self.sent_cells[row * num_cols:(row + 1) * num_cols] for row in range(game.grid.num_rows)]
+
+    def state(self):
+        """
+        Returns:
+            tuple: What decides when gravity is next due, besides the timer: level, paused and game over.
+        """
+        return self.game.level, self.game.paused, self.game.game_over
+
+    def changed_rows(self):
+        """
+        Find the rows that changed since the board was last sent, and remember them as sent.
+
+        Returns:
+            list[int]: The changed rows.
+        """
+        grid = self.game.grid
+        cells = grid.cells
+        # Whole-plane comparison first: most updates only move the falling piece.
+        if cells == self.sent_cells:
+            return []
+        num_cols = grid.num_cols
+        sent_rows = self.sent_rows
+        rows = [row for row in range(grid.num_rows) if cells[row * num_cols:(row + 1) * num_cols] != sent_rows[row]]
+        self.sent_cells = bytes(cells)
+        for row in rows:
+            sent_rows[row] = self.sent_cells[row * num_cols:(row + 1) * num_cols]
+        return rows
+
+    def encode(self, full=False):
+        """
+        Encode an UPDATE of the board.
+
+        Args:
+            full (bool): Include every row, for a new subscriber, instead of the rows that
+                changed since the last update. A full update does not count as sent, so it
+                must only be encoded when nothing is pending; see GameServer.send_welcome.
+
+        Returns:
+            bytes: The message.
+        """
+        game = self.game
+        grid = game.grid
+        num_cols = grid.num_cols
+        rows = range(grid.num_rows) if full else self.changed_rows()
+        block = game.current_block
+        flags = (PAUSED_FLAG if game.paused else 0) | (GAME_OVER_FLAG if game.game_over else 0)
+        parts = [UPDATE_HEADER.pack(UPDATE, self.board_id, game.score, game.level, game.total_lines_cleared, flags,
+                                    PIECES.index(type(block)), block.rotation_state, block.row_offset,
+                                    block.column_offset, PIECES.index(type(game.next_block)), len(rows))]
+        cells = grid.cells
+        for row in rows:
+            parts.append(ROW_INDEX.pack(row))
+            parts.append(cells[row * num_cols:(row + 1) * num_cols])
+        return b"".join(parts)
+
+
+class Client:
+    """
+    A connection to the server: its writer, the board it plays and the updates waiting to go out.
+    """
+    def __init__(self, writer):
+        self.writer = writer
+        self.board = None
+        self.watching = []
+        self.outgoing = []
+
+
+class GameServer:
+    """
+    Hosts any number of boards on one event loop; see the module docstring.
+
+    Gravity for every board is run by one scheduler task from a heap of
+    (due time, board id) entries. An entry is stale once the board has been
+    rescheduled (its `due` no longer matches) or closed, and is skipped when it
+    comes up, so rescheduling never searches the heap. Boards that change are
+    collected in `dirty` and flushed together, no more than `send_rate` times a second.
+    """
+    def __init__(self, num_rows=20, num_cols=10, send_rate=60):
+        """
+        Args:
+            num_rows (int): Rows of every board.
+            num_cols (int): Columns of every board.
+            send_rate (float): Most updates per second sent of one board, 0 to send after every change.
+        """
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.send_interval = 1 / send_rate if send_rate > 0 else 0
+        self.boards = {}
+        self.board_ids = itertools.count(1)
+        self.schedule = []
+        self.dirty = set()
+        self.waiting_clients = set()
+        self.flush_handle = None
+        self.last_flush = 0.0
+        self.wakeup = None
+        self.next_wake = None
+        self.clients = set()
+        self.port = None
+        self.drops = 0
+        self.updates = 0
+        self.bytes_sent = 0
+        self.dropped_clients = 0
+        # Seconds each gravity drop ran after it was due, for the most recent drops.
+        self.lateness = deque(maxlen=10_000)
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+
+    async def serve(self, host="127.0.0.1", port=7777):
+        """
+        Accept clients and run gravity until cancelled.
+
+        Args:
+            host (str): Address to listen on; the default only accepts local clients.
+            port (int): Port to listen on, 0 for any free port.
+        """
+        server = await asyncio.start_server(self.handle_client, host, port)
+        self.port = server.sockets[0].getsockname()[1]
+        async with server:
+            await self.run_gravity()
+
+    def create_board(self, client, seed):
+        """
+        Start a new game played by a client, closing the board it played before.
+
+        Args:
+            client (Client): The player.
+            seed (int): Seed for the pieces, 0 for a random one.
+        """
+        if client.board is not None:
+            self.close_board(client.board)
+        board = HostedBoard(next(self.board_ids), Game(seed=seed or None, grid=Grid(self.num_rows, self.num_cols)),
+                            client)
+        self.boards[board.board_id] = board
+        client.board = board
+        self.send_welcome(client, board)
+        self.reschedule(board, asyncio.get_running_loop().time())
+
+    def watch(self, client, board_id):
+        """
+        Subscribe a client to a board's updates. Unknown boards are answered with CLOSED.
+
+        Args:
+            client (Client): The subscriber.
+            board_id (int): The board to watch.
+        """
+        board = self.boards.get(board_id)
+        if board is None:
+            self.send(client, CLOSED_MESSAGE.pack(CLOSED, board_id))
+            return
+        if client not in board.subscribers:
+            board.subscribers.append(client)
+            client.watching.append(board)
+        self.send_welcome(client, board)
+
+    def send_welcome(self, client, board):
+        """
+        Queue WELCOME and a full UPDATE of a board for one client. A pending delta of the
+        board is queued for its other subscribers first, so the full update and the next
+        delta start from the same rows: otherwise a row that changed and changed back
+        before the next flush would be left out of the delta, and the new subscriber
+        would keep the version it was sent.
+        """
+        if board in self.dirty:
+            self.dirty.discard(board)
+            message = board.encode()
+            self.updates += 1
+            for subscriber in board.subscribers:
+                if subscriber is not client:
+                    self.send(subscriber, message)
+        self.send(client, WELCOME_MESSAGE.pack(WELCOME, board.board_id, self.num_rows, self.num_cols))
+        self.send(client, board.encode(full=True))
+
+    def close_board(self, board):
+        """
+        Stop hosting a board and tell its other subscribers.
+        """
+        del self.boards[board.board_id]
+        self.dirty.discard(board)
+        message = CLOSED_MESSAGE.pack(CLOSED, board.board_id)
+        for client in board.subscribers:
+            if client is not board.player:
+                client.watching.remove(board)
+                self.send(client, message)
+        board.player.board = None
+
+    def apply_action(self, board, action):
+        """
+        Apply a player's action straight away, rescheduling gravity when the action
+        paused, resumed, reset or levelled up the game.
+        """
+        before = board.state()
+        board.game.apply_action(action)
+        if board.state() != before:
+            self.reschedule(board, asyncio.get_running_loop().time())
+        self.mark_dirty(board)
+
+    def reschedule(self, board, now):
+        """
+        Work out when a board's next gravity drop is due and push it onto the schedule.
+        Paused and finished games are not scheduled until they resume.
+
+        Args:
+            board (HostedBoard): The board.
+            now (float): The event loop's current time.
+        """
+        game = board.game
+        if game.paused or game.game_over:
+            board.due = None
+            return
+        if board.due is None:
+            # Time spent paused or over does not count towards the next drop.
+            board.last_gravity = now
+        board.due = board.last_gravity + max(0.0, game.get_drop_speed() - game.gravity_timer) / 1000
+        heapq.heappush(self.schedule, (board.due, board.board_id))
+        if self.next_wake is not None and board.due < self.next_wake:
+            self.wake()
+
+    def wake(self):
+        """
+        Wake the scheduler early, e.g. because a board is now due before the time it sleeps until.
+        """
+        if self.wakeup is not None and not self.wakeup.done():
+            self.wakeup.set_result(None)
+
+    async def run_gravity(self):
+        """
+        Run every board's gravity drop when it falls due, forever. Each board's elapsed
+        time since its last drop goes to Game.tick, so a drop that runs late carries
+        the lateness in the gravity timer and the board does not drift.
+        """
+        loop = asyncio.get_running_loop()
+        schedule = self.schedule
+        boards = self.boards
+        while True:
+            now = loop.time()
+            while schedule and schedule[0][0] <= now:
+                due, board_id = heapq.heappop(schedule)
+                board = boards.get(board_id)
+                if board is None or board.due != due:
+                    continue
+                self.lateness.append(now - due)
+                self.drops += 1
+                board.game.tick((now - board.last_gravity) * 1000)
+                board.last_gravity = now
+                self.reschedule(board, now)
+                self.mark_dirty(board)
+            self.wakeup = loop.create_future()
+            if schedule:
+                self.next_wake = schedule[0][0]
+                timer = loop.call_at(self.next_wake, self.wake)
+                await self.wakeup
+                timer.cancel()
+            else:
+                self.next_wake = float("inf")
+                await self.wakeup
+            self.next_wake = None
+
+    def mark_dirty(self, board):
+        """
+        Note that a board changed, so it is sent in the next flush.
+        """
+        self.dirty.add(board)
+        self.schedule_flush()
+
+    def send(self, client, message):
+        """
+        Queue a message for one client, to be written in the next flush.
+        """
+        client.outgoing.append(message)
+        self.waiting_clients.add(client)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        """
+        Make sure a flush is scheduled, no sooner than `send_interval` after the last one.
+        """
+        if self.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self.flush_handle = loop.call_at(max(loop.time(), self.last_flush + self.send_interval), self.flush)
+
+    def flush(self):
+        """
+        Encode an UPDATE of every changed board once and queue it for each of its
+        subscribers, then hand each client's messages to its socket in one write.
+        """
+        self.flush_handle = None
+        self.last_flush = asyncio.get_running_loop().time()
+        waiting = self.waiting_clients
+        for board in self.dirty:
+            message = board.encode()
+            self.updates += 1
+            for client in board.subscribers:
+                client.outgoing.append(message)
+                waiting.add(client)
+        self.dirty.clear()
+        for client in waiting:
+            data = b"".join(client.outgoing)
+            client.outgoing.clear()
+            transport = client.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > MAX_BUFFERED:
+                self.dropped_clients += 1
+                transport.abort()
+                continue
+            client.writer.write(data)
+            self.bytes_sent += len(data)
+        waiting.clear()
+
+    async def handle_client(self, reader, writer):
+        """
+        Read one client's commands until it disconnects, then close the board it played.
+        """
+        client = Client(writer)
+        self.clients.add(client)
+        try:
+            while True:
+                command, argument = COMMAND.unpack(await reader.readexactly(COMMAND.size))
+                if command == ACTION:
+                    if client.board is not None:
+                        self.apply_action(client.board, argument)
+                elif command == NEW:
+                    self.create_board(client, argument)
+                elif command == WATCH:
+                    self.watch(client, argument)
+                else:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(client)
+            self.waiting_clients.discard(client)
+            if client.board is not None:
+                self.close_board(client.board)
+            for board in client.watching:
+                board.subscribers.remove(client)
+            writer.close()
+
+    def report(self):
+        """
+        Returns:
+            str: Boards and clients hosted, gravity drops, updates and bytes sent per second,
+                how late drops ran (p50 and p99) and the CPU used, as a percentage of one core.
+        """
+        seconds = max(time.perf_counter() - self.started, 1e-9)
+        cpu = time.process_time() - self.started_cpu
+        lateness = sorted(self.lateness)
+        p50 = lateness[len(lateness) // 2] * 1000 if lateness else 0.0
+        p99 = lateness[int(len(lateness) * 0.99)] * 1000 if lateness else 0.0
+        return (f"{len(self.boards)} boards, {len(self.clients)} clients, "
+                f"{self.drops / seconds:,.0f} drops/s, {self.updates / seconds:,.0f} updates/s, "
+                f"{self.bytes_sent / seconds / 1024:,.0f} KiB/s, drops late by p50 {p50:.1f} ms p99 {p99:.1f} ms, "
+                f"{self.dropped_clients} slow clients dropped, {cpu / seconds:.0%} CPU")
+
+
+class RemoteBoard:
+    """
+    A client's copy of a board, kept up to date by applying the server's UPDATEs.
+    """
+    def __init__(self, board_id, num_rows, num_cols):
+        self.board_id = board_id
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.cells = bytearray(num_rows * num_cols)
+        self.score = 0
+        self.level = 0
+        self.lines = 0
+        self.paused = False
+        self.game_over = False
+        self.piece = None
+        self.next_piece = None
+
+
+async def read_message(reader, boards):
+    """
+    Read one message from the server and apply it to the client's boards.
+
+    Args:
+        reader (asyncio.StreamReader): The connection to the server.
+        boards (dict[int, RemoteBoard]): The client's boards by id. WELCOME adds one, CLOSED removes it.
+
+    Returns:
+        tuple[int, int]: The message's type and board id.
+    """
+    kind = (await reader.readexactly(1))[0]
+    if kind == WELCOME:
+        data = await reader.readexactly(WELCOME_MESSAGE.size - 1)
+        _, board_id, num_rows, num_cols = WELCOME_MESSAGE.unpack(bytes([kind]) + data)
+        boards[board_id] = RemoteBoard(board_id, num_rows, num_cols)
+    elif kind == UPDATE:
+        data = await reader.readexactly(UPDATE_HEADER.size - 1)
+        (_, board_id, score, level, lines, flags, piece, rotation, row, column,
+         next_piece, num_changed) = UPDATE_HEADER.unpack(bytes([kind]) + data)
+        board = boards[board_id]
+        board.score, board.level, board.lines = score, level, lines
+        board.paused = bool(flags & PAUSED_FLAG)
+        board.game_over = bool(flags & GAME_OVER_FLAG)
+        board.piece = (piece, rotation, row, column)
+        board.next_piece = next_piece
+        num_cols = board.num_cols
+        data = await reader.readexactly(num_changed * (ROW_INDEX.size + num_cols))
+        for position in range(0, len(data), ROW_INDEX.size + num_cols):
+            (changed,) = ROW_INDEX.unpack_from(data, position)
+            start = position + ROW_INDEX.size
+            board.cells[changed * num_cols:(changed + 1) * num_cols] = data[start:start + num_cols]
+    elif kind == CLOSED:
+        data = await reader.readexactly(CLOSED_MESSAGE.size - 1)
+        _, board_id = CLOSED_MESSAGE.unpack(bytes([kind]) + data)
+        boards.pop(board_id, None)
+    else:
+        raise ValueError(f"unknown message type {kind}")
+    return kind, board_id
+
+
+async def report_every(server, seconds):
+    """
+    Print the server's report every few seconds.
+    """
+    while True:
+        await asyncio.sleep(seconds)
+        print(server.report(), flush=True)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Host Drop Block games for local clients.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=7777, help="port to listen on")
+    parser.add_argument("--rows", type=int, default=20, help="rows of every board")
+    parser.add_argument("--cols", type=int, default=10, help="columns of every board")
+    parser.add_argument("--send-rate", type=float, default=60,
+                        help="most updates per second sent of one board, 0 to send every change at once")
+    parser.add_argument("--report", type=float, default=10, metavar="SECONDS", help="print statistics this often")
+    args = parser.parse_args()
+    server = GameServer(args.rows, args.cols, args.send_rate)
+    serving = asyncio.create_task(server.serve(args.host, args.port))
+    while server.port is None and not serving.done():
+        await asyncio.sleep(0.01)
+    if server.port is not None:
+        print(f"serving on {args.host}:{server.port}", flush=True)
+    reporter = asyncio.create_task(report_every(server, args.report))
+    try:
+        await serving
+    finally:
+        reporter.cancel()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
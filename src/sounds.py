@@ -0,0 +1,241 @@
+import os
+import queue
+import threading
+import time
+
+
+class NullSounds:
+    """
+    Silent sound backend used when the game runs headless (bots, replays, tests).
+    Accepts the same calls as PygameSounds and does nothing with them.
+    """
+
+    def play(self, name):
+        """
+        Ignore a request to play a sound.
+
+        Args:
+            name (str): The name of the sound, e.g. "place" or "clear".
+        """
+        pass
+
+    def report(self):
+        """
+        Returns:
+            str: That no sounds are played.
+        """
+        return "sounds: off"
+
+    def close(self):
+        """
+        Nothing to stop.
+        """
+        pass
+
+
+class PygameSounds:
+    """
+    Sound backend that plays the game's effects through pygame.mixer from its own thread.
+
+    play() only puts the sound's name and the time on a queue.SimpleQueue, which never
+    blocks the caller, so game logic never waits on the mixer. The audio thread
+    initialises the mixer, loads the sounds, then plays each queued event on a pool of
+    channels reserved for effects: a free one if there is one, otherwise the one that
+    started longest ago. A sound triggered again within `coalesce_ms` of its last play
+    is dropped, as are events that waited longer than `max_latency_ms` (e.g. while the
+    sounds were still loading), so bursts from fast drops or the bot cannot pile up.
+
+    Without an audio device no sounds are loaded and every event is dropped, as are
+    events for a sound whose file could not be read or decoded. If the audio thread
+    stops for any reason, play() drops and counts events instead of queueing them. Decoding
+    the MP3s is the slow part of loading, so the decoded samples are cached in a .pcm
+    file next to each one, named after the mixer format, and later launches load that instead.
+    """
+
+    FILES = {
+        "place": "sounds/thump.mp3",
+        "clear": "sounds/clear.mp3",
+    }
+
+    def __init__(self, channels=4, coalesce_ms=40, max_latency_ms=100):
+        """
+        Start the audio thread, which initialises the mixer and loads every sound
+        effect listed in FILES before it starts playing events.
+
+        Args:
+            channels (int): Mixer channels reserved for the effects.
+            coalesce_ms (float): Repeats of a sound closer together than this are dropped.
+            max_latency_ms (float): Events that waited longer than this are dropped.
+        """
+        import pygame
+
+        self.pygame = pygame
+        self.num_channels = channels
+        self.coalesce_seconds = coalesce_ms / 1000
+        self.max_latency = max_latency_ms / 1000
+        self.events = queue.SimpleQueue()
+        self.sounds = {}
+        self.cached = 0
+        self.load_seconds = None
+        self.loaded = threading.Event()
+        self.played = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.stolen = 0
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name="audio", daemon=True)
+        self.thread.start()
+
+    def cache_path(self, path):
+        """
+        Get the file the decoded samples of a sound are cached in. The mixer's format is
+        part of the name, since the samples are only valid for that format.
+
+        Args:
+            path (str): The sound file.
+
+        Returns:
+            str: The cache file beside it.
+        """
+        frequency, size, channels = self.pygame.mixer.get_init()
+        sample = f"{'s' if size < 0 else 'u'}{abs(size)}"
+        return f"{os.path.splitext(path)[0]}.{frequency}hz-{sample}-{channels}ch.pcm"
+
+    def load_sound(self, path):
+        """
+        Load one sound, from its cache when that is newer than the sound file,
+        otherwise by decoding it and writing the cache.
+
+        Args:
+            path (str): The sound file.
+
+        Returns:
+            pygame.mixer.Sound: The loaded sound.
+        """
+        cache = self.cache_path(path)
+        try:
+            if os.path.getmtime(cache) >= os.path.getmtime(path):
+                with open(cache, "rb") as file:
+                    sound = self.pygame.mixer.Sound(buffer=file.read())
+                self.cached += 1
+                return sound
+        except OSError:
+            pass
+        sound = self.pygame.mixer.Sound(path)
+        # A missing or read-only asset folder only means the next launch decodes again.
+        try:
+            with open(cache + ".tmp", "wb") as file:
+                file.write(sound.get_raw())
+            os.replace(cache + ".tmp", cache)
+        except OSError:
+            pass
+        return sound
+
+    def load(self):
+        """
+        Initialise the mixer, reserve the effect channels and load every sound in FILES.
+        A sound whose file is missing or cannot be decoded is skipped.
+
+        Returns:
+            list[pygame.mixer.Channel]: The reserved channels, empty without an audio device.
+        """
+        from utils import resource_path
+
+        start = time.perf_counter()
+        channels = []
+        try:
+            self.pygame.mixer.init()
+            if self.pygame.mixer.get_num_channels() < self.num_channels:
+                self.pygame.mixer.set_num_channels(self.num_channels)
+            # Reserved channels are skipped by Sound.play(), so nothing else can take them.
+            self.pygame.mixer.set_reserved(self.num_channels)
+            channels = [self.pygame.mixer.Channel(index) for index in range(self.num_channels)]
+            for name, path in self.FILES.items():
+                try:
+                    self.sounds[name] = self.load_sound(resource_path(path))
+                except (OSError, self.pygame.error):
+                    # A missing or broken file only silences that sound.
+                    pass
+        except self.pygame.error:
+            # No audio device: the game plays on silently.
+            pass
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self.loaded.set()
+        return channels
+
+    def run(self):
+        """
+        Body of the audio thread: play_events() until close() is called. However it ends,
+        play() is told to stop queueing and the events left are counted as dropped.
+        """
+        try:
+            self.play_events()
+        finally:
+            self.stopped = True
+            self.loaded.set()
+            while True:
+                try:
+                    event = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                if event is not None:
+                    self.dropped += 1
+
+    def play_events(self):
+        """
+        Load the sounds, then play queued events until the None sent by close() arrives.
+        """
+        channels = self.load()
+        started = [0.0] * len(channels)
+        last_played = {}
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            name, timestamp = event
+            now = time.perf_counter()
+            sound = self.sounds.get(name)
+            if sound is None or now - timestamp > self.max_latency:
+                self.dropped += 1
+                continue
+            if timestamp - last_played.get(name, -self.coalesce_seconds) < self.coalesce_seconds:
+                self.coalesced += 1
+                continue
+            last_played[name] = timestamp
+            channel = next((index for index, channel in enumerate(channels) if not channel.get_busy()), None)
+            if channel is None:
+                channel = started.index(min(started))
+                self.stolen += 1
+            channels[channel].play(sound)
+            started[channel] = now
+            self.played += 1
+
+    def play(self, name):
+        """
+        Queue a sound effect to be played by the audio thread. Never blocks.
+        Once the audio thread has stopped the event is dropped instead.
+
+        Args:
+            name (str): The name of the sound, e.g. "place" or "clear".
+        """
+        if self.stopped:
+            self.dropped += 1
+            return
+        self.events.put((name, time.perf_counter()))
+
+    def report(self):
+        """
+        Returns:
+            str: How many sound events were played, coalesced and dropped (late or not loaded),
+                and how many were played on a channel taken from an older sound.
+        """
+        return (f"sounds: {self.played} played, {self.coalesced} coalesced, {self.dropped} dropped, "
+                f"{self.stolen} on a stolen channel of {self.num_channels}")
+
+    def close(self):
+        """
+        Stop the audio thread once it has handled the events already queued.
+        """
+        self.events.put(None)
+        self.thread.join()
@@ -0,0 +1,123 @@
+import time
+
+class FixedTimestep:
+    """
+    Fixed-rate logic clock for the main loop.
+
+    Real time is measured with time.perf_counter and collected in an accumulator;
+    each call to pending() hands out the whole ticks that have elapsed since the
+    last call. Logic and input run once per tick, so their timing no longer depends
+    on how long a frame took to draw. Counters are kept so the timing can be checked.
+    """
+    def __init__(self, tick_rate=240, max_backlog=0.25):
+        """
+        Initialise the clock.
+
+        Args:
+            tick_rate (int): Logic ticks per second.
+            max_backlog (float): Most seconds of ticks that may be owed at once. Any more is
+                dropped so a long stall (e.g. dragging the window) doesn't trigger a burst of catch-up.
+        """
+        self.tick_rate = tick_rate
+        self.tick_seconds = 1 / tick_rate
+        self.tick_ms = 1000 / tick_rate
+        self.max_backlog = max_backlog
+        self.previous = time.perf_counter()
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.dropped_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.max_ticks_at_once = 0
+
+    def pending(self):
+        """
+        Collect the time elapsed since the last call and return the ticks now due.
+
+        Returns:
+            int: Number of logic ticks to run before the next frame.
+        """
+        now = time.perf_counter()
+        self.accumulator += now - self.previous
+        self.previous = now
+        if self.accumulator > self.max_backlog:
+            self.dropped_seconds += self.accumulator - self.max_backlog
+            self.accumulator = self.max_backlog
+        ticks = int(self.accumulator / self.tick_seconds)
+        self.accumulator -= ticks * self.tick_seconds
+        self.ticks += ticks
+        self.max_ticks_at_once = max(self.max_ticks_at_once, ticks)
+        return ticks
+
+    def resync(self):
+        """
+        Skip the time since the last call instead of owing ticks for it, so the loop does
+        not catch up after sleeping through a stretch where ticks had nothing to do, e.g.
+        while paused. One tick is left due so whatever woke the loop is handled at once.
+        """
+        now = time.perf_counter()
+        self.idle_seconds += now - self.previous
+        self.previous = now
+        self.accumulator = self.tick_seconds
+
+    def time_to_next_tick(self):
+        """
+        Get the time left until the next logic tick is due.
+
+        Returns:
+            float: Seconds until the next tick is due, 0 if one is already due.
+        """
+        elapsed = self.accumulator + time.perf_counter() - self.previous
+        return max(0.0, self.tick_seconds - elapsed)
+
+    def report(self, seconds, frames):
+        """
+        Summarise the measured timing over a run.
+
+        Args:
+            seconds (float): Wall-clock length of the run.
+            frames (int): Frames rendered during the run.
+
+        Returns:
+            str: Measured tick rate while not idle, frame rate, worst catch-up, time dropped and time idle.
+        """
+        active = max(seconds - self.idle_seconds, 1e-9)
+        return (f"ticks/s {self.ticks / active:.1f} (target {self.tick_rate}), "
+                f"frames/s {frames / seconds:.1f}, "
+                f"most ticks in one frame {self.max_ticks_at_once}, "
+                f"dropped {self.dropped_seconds * 1000:.1f} ms, "
+                f"idle {self.idle_seconds:.1f} s")
+
+
+class CpuMeter:
+    """
+    Measures the process's CPU use separately for each state of the main loop,
+    e.g. "playing" and "idle", by charging the CPU and wall time since the last
+    update to the state the loop was in.
+    """
+    def __init__(self):
+        self.previous_wall = time.perf_counter()
+        self.previous_cpu = time.process_time()
+        self.wall = {}
+        self.cpu = {}
+
+    def update(self, state):
+        """
+        Charge the time since the last update to a state.
+
+        Args:
+            state (str): The state the loop has been in since the last update.
+        """
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        self.wall[state] = self.wall.get(state, 0.0) + wall - self.previous_wall
+        self.cpu[state] = self.cpu.get(state, 0.0) + cpu - self.previous_cpu
+        self.previous_wall = wall
+        self.previous_cpu = cpu
+
+    def report(self):
+        """
+        Returns:
+            str: CPU use as a percentage of one core, and the time spent, for each state.
+        """
+        return ", ".join(f"{state}: {self.cpu[state] / self.wall[state]:.1%} CPU over {self.wall[state]:.1f} s"
+                         for state in self.wall if self.wall[state] > 0)
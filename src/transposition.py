@@ -0,0 +1,104 @@
+from collections import OrderedDict
+import sys
+
+class TranspositionCache:
+    """
+    Least-recently-used cache of search results keyed on board state,
+    e.g. (board hash, piece id, rotation, row, column) -> evaluation.
+
+    Bounded by entry count and, optionally, by an estimate of the memory its keys and
+    values use. Hit, miss and eviction counters are kept so the cache can be sized.
+    """
+    def __init__(self, max_entries=100_000, max_bytes=None):
+        """
+        Args:
+            max_entries (int): Most entries kept before the least recently used is evicted.
+            max_bytes (int): Optional limit on the estimated size of stored keys and values.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Look up a key, marking it as recently used.
+
+        Args:
+            key: The state key.
+            default: Returned when the key is not cached.
+
+        Returns:
+            The cached value, or default.
+        """
+        value = self.entries.get(key, self)
+        if value is self:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entries if a limit is exceeded.
+
+        Args:
+            key: The state key.
+            value: The result to cache.
+        """
+        if key in self.entries:
+            self.bytes -= self.entry_size(key, self.entries[key])
+            self.entries.move_to_end(key)
+        self.entries[key] = value
+        self.bytes += self.entry_size(key, value)
+        while len(self.entries) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            old_key, old_value = self.entries.popitem(last=False)
+            self.bytes -= self.entry_size(old_key, old_value)
+            self.evictions += 1
+
+    def entry_size(self, key, value):
+        """
+        Rough size in bytes of one entry: its key, its value and the dict slot.
+        Only computed when a memory limit is set.
+        """
+        if self.max_bytes is None:
+            return 0
+        return sys.getsizeof(key) + sys.getsizeof(value) + 100
+
+    def clear(self):
+        """
+        Remove every entry. Counters are kept.
+        """
+        self.entries.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        """
+        float: Fraction of lookups that were hits, 0 before any lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        Get the cache's size and counters, e.g. for logging while tuning its limits.
+
+        Returns:
+            dict: Entry count, estimated bytes, hits, misses, evictions and hit rate.
+        """
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
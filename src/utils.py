@@ -1,9 +1,10 @@
 import sys, os
 
 def resource_path(relative_path):
-    """Used for PyInstaller - gets the paths to the files based on absolute and relative paths."""
+    """Used for PyInstaller - gets the paths to the files based on absolute and relative paths.
+    Outside a bundle, paths are relative to the repository root (the folder above src), not the working directory."""
     try:
         base_path = sys._MEIPASS
     except AttributeError:
-        base_path = os.path.abspath(".")
+        base_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
     return os.path.join(base_path, relative_path)
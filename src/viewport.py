@@ -0,0 +1,143 @@
+import pygame
+from colours import Colours
+
+class Viewport:
+    """
+    The game window, and the logical-resolution canvas the scene is drawn on.
+
+    The Renderer always draws at its logical size. When the window is exactly that
+    size the canvas is the display surface itself, so frames cost nothing extra.
+    Otherwise the canvas is a separate surface that present() scales
+    into the window on each frame where something changed, keeping the aspect ratio.
+    At a whole-number scale every canvas pixel becomes an exact block of window
+    pixels, so only the areas drawn that frame are scaled, with pygame.transform.scale,
+    and cells stay crisp. Any other scale smoothscales, which blends neighbouring
+    pixels, so an arbitrary area scaled on its own would not line up with the pixels
+    around it. Instead the canvas is divided into fixed regions with only plain
+    background along their edges (Renderer.regions), and only the regions a frame drew
+    in are smoothscaled, always onto the same part of the window. A move rescales the
+    board's column and a new score only its panel, but the board's column is still
+    rescaled whole: its cells are too close together to cut it up without seams. The
+    bars around a letterboxed scene are filled when the window changes size, not every frame.
+
+    The window is resizable and can be switched to and from fullscreen.
+    """
+    def __init__(self, logical_size, scale=1.0, fullscreen=False, regions=None):
+        """
+        Open the window.
+
+        Args:
+            logical_size (tuple[int, int]): Size the scene is drawn at, e.g. Renderer.window_size.
+            scale (float): Size of the window as a multiple of the logical size.
+            fullscreen (bool): Start in fullscreen at the desktop's resolution.
+            regions (list[pygame.Rect]): Rectangles covering the canvas without overlapping, each
+                with only plain background along its edges, e.g. Renderer.regions. Defaults to
+                the whole canvas as one region.
+        """
+        self.logical_size = logical_size
+        self.regions = regions or [pygame.Rect((0, 0), logical_size)]
+        self.windowed_size = (round(logical_size[0] * scale), round(logical_size[1] * scale))
+        self.fullscreen = fullscreen
+        self.offscreen = None
+        self.open()
+
+    def open(self):
+        """
+        Set the display mode for the current windowed size or fullscreen, then lay out the scene in it.
+        """
+        if self.fullscreen:
+            pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            pygame.display.set_mode(self.windowed_size, pygame.RESIZABLE)
+        self.layout()
+
+    def layout(self):
+        """
+        Fit the scene to the window's current size. Called after the window opens or is resized.
+        """
+        screen = pygame.display.get_surface()
+        self.screen = screen
+        window_width, window_height = screen.get_size()
+        logical_width, logical_height = self.logical_size
+        scale = min(window_width / logical_width, window_height / logical_height)
+        width = max(1, round(logical_width * scale))
+        height = max(1, round(logical_height * scale))
+        self.target_rect = pygame.Rect((window_width - width) // 2, (window_height - height) // 2, width, height)
+        self.scaled = self.target_rect.size != self.logical_size
+        if self.scaled:
+            if self.offscreen is None:
+                self.offscreen = pygame.Surface(self.logical_size).convert()
+            self.canvas = self.offscreen
+            self.target = screen.subsurface(self.target_rect)
+        else:
+            self.canvas = screen.subsurface(self.target_rect) if screen.get_size() != self.logical_size else screen
+            self.target = None
+        # Whole-number scale factor, or 0 when the scale is fractional or differs between the axes.
+        whole = width // logical_width
+        self.whole_scale = whole if (width, height) == (whole * logical_width, whole * logical_height) else 0
+        # Where each region goes in the target. Edges are rounded the same way on both sides,
+        # so neighbouring regions meet without a gap or overlap.
+        self.region_targets = []
+        for region in self.regions:
+            left = round(region.left * width / logical_width)
+            top = round(region.top * height / logical_height)
+            target = pygame.Rect(left, top, round(region.right * width / logical_width) - left,
+                                 round(region.bottom * height / logical_height) - top)
+            if target.width and target.height:
+                self.region_targets.append((region, target))
+        screen.fill(Colours.board_colour)
+        self.needs_flip = True
+
+    def resized(self):
+        """
+        Handle the window having been resized or re-exposed. The canvas may be a new surface
+        afterwards, so the scene must be redrawn in full.
+        """
+        if not self.fullscreen:
+            self.windowed_size = pygame.display.get_surface().get_size()
+        self.layout()
+
+    def toggle_fullscreen(self):
+        """
+        Switch between fullscreen and the last windowed size. The scene must be redrawn in full afterwards.
+        """
+        self.fullscreen = not self.fullscreen
+        self.open()
+
+    def present(self, dirty_rects):
+        """
+        Show the parts of the canvas that were drawn this frame.
+
+        Args:
+            dirty_rects (list[pygame.Rect]): Areas of the canvas that changed, in logical coordinates.
+        """
+        if not dirty_rects and not self.needs_flip:
+            return
+        if self.scaled and self.whole_scale and not self.needs_flip:
+            scale = self.whole_scale
+            canvas_rect = self.canvas.get_rect()
+            scaled_rects = []
+            for rect in dirty_rects:
+                area = rect.clip(canvas_rect)
+                target = pygame.Rect(area.x * scale, area.y * scale, area.width * scale, area.height * scale)
+                pygame.transform.scale(self.canvas.subsurface(area), target.size, self.target.subsurface(target))
+                scaled_rects.append(target.move(self.target_rect.topleft))
+            dirty_rects = scaled_rects
+        elif self.scaled and self.whole_scale:
+            pygame.transform.scale(self.canvas, self.target_rect.size, self.target)
+            dirty_rects = [self.target_rect]
+        elif self.scaled:
+            scaled_rects = []
+            for region, target in self.region_targets:
+                if self.needs_flip or region.collidelist(dirty_rects) != -1:
+                    pygame.transform.smoothscale(self.canvas.subsurface(region), target.size,
+                                                 self.target.subsurface(target))
+                    scaled_rects.append(target.move(self.target_rect.topleft))
+            dirty_rects = scaled_rects
+        elif self.canvas is not self.screen:
+            dirty_rects = [rect.move(self.target_rect.topleft) for rect in dirty_rects]
+        if self.needs_flip:
+            pygame.display.flip()
+            self.needs_flip = False
+        else:
+            pygame.display.update(dirty_rects)
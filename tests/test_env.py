@@ -0,0 +1,27 @@
+import pytest
+import actions
+from env import NUM_ACTIONS, DropBlockEnv, VectorEnv
+
+
+@pytest.mark.parametrize("action", [-1, NUM_ACTIONS, actions.PAUSE_TOGGLE, actions.RESET])
+def test_step_rejects_actions_out_of_range(action):
+    env = DropBlockEnv(seed=1)
+    env.reset()
+    with pytest.raises(ValueError):
+        env.step(action)
+    assert not env.game.paused
+
+
+def test_step_accepts_every_action_in_range():
+    env = DropBlockEnv(seed=1)
+    env.reset()
+    for action in range(NUM_ACTIONS):
+        env.step(action)
+
+
+def test_vector_step_rejects_actions_out_of_range():
+    with VectorEnv(2, processes=1) as envs:
+        envs.reset()
+        with pytest.raises(ValueError):
+            envs.step([0, actions.RESET])
+        envs.step([0, actions.ROTATE])
@@ -0,0 +1,16 @@
+import pytest
+from game import MAX_SEED, Game
+
+
+@pytest.mark.parametrize("seed", [-1, MAX_SEED])
+def test_out_of_range_seed_is_rejected(seed):
+    with pytest.raises(ValueError):
+        Game(seed=seed)
+
+
+def test_largest_seed_round_trips_through_pack_state():
+    game = Game(seed=MAX_SEED - 1)
+    restored = Game(seed=1)
+    restored.load_state(game.pack_state())
+    assert restored.seed == MAX_SEED - 1
+    assert restored.pack_state() == game.pack_state()